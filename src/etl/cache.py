@@ -0,0 +1,197 @@
+"""
+Content-addressed cache for intermediate ETL artifacts.
+
+Artifacts are stored as Parquet files under `data/intermediate/`, named after a
+hash of the source workbook bytes and the parameters that shaped the artifact,
+so any change to either produces a new cache entry.
+"""
+
+import hashlib
+import json
+import logging
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+HASH_CHUNK_SIZE = 1 << 20
+
+# Parquet key-value metadata holding DataFrame.attrs for batch-written entries
+ATTRS_METADATA_KEY = "etl_attrs"
+
+
+def file_sha256(file_path: Path) -> str:
+    """Returns the SHA-256 hex digest of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_key(file_path: Path, params: dict, file_digest: str | None = None) -> str:
+    """
+    Builds a cache key from the content of a file and the parameters applied to it.
+
+    Args:
+        file_path: Source file whose bytes identify the input.
+        params: JSON-serialisable parameters (sheet name, columns, ETL version...).
+        file_digest: `file_sha256` of the file when already computed; the file is
+            only hashed when it is not given.
+
+    Returns:
+        A hex digest identifying the (file content, parameters) pair.
+    """
+    digest = hashlib.sha256((file_digest or file_sha256(file_path)).encode("utf-8"))
+    digest.update(json.dumps(params, sort_keys=True, default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _read_attrs(cache_path: Path) -> dict:
+    """Returns the DataFrame attrs stored with a batch-written cache entry."""
+    metadata = pq.read_metadata(cache_path).metadata or {}
+    raw = metadata.get(ATTRS_METADATA_KEY.encode("utf-8"))
+    return json.loads(raw) if raw else {}
+
+
+def load_frame(cache_path: Path, logger: logging.Logger) -> pd.DataFrame | None:
+    """Loads a cached DataFrame, or returns None when there is no cache entry."""
+    if not cache_path.exists():
+        logger.info(f"No cache entry at {cache_path}")
+        return None
+    df = pd.read_parquet(cache_path)
+    df.attrs = _read_attrs(cache_path) or df.attrs
+    logger.info(f"Loaded {len(df)} rows from cache {cache_path}")
+    return df
+
+
+def iter_frame_batches(cache_path: Path, batch_size: int) -> Iterator[pd.DataFrame]:
+    """
+    Reads a cached DataFrame back as batches of at most `batch_size` rows.
+
+    Batches are indexed by their position in the cached frame and carry the cached
+    attrs, matching the batches `write_frame_batches` was given.
+    """
+    parquet_file = pq.ParquetFile(cache_path)
+    attrs = _read_attrs(cache_path)
+    n_rows = 0
+    for record_batch in parquet_file.iter_batches(batch_size=batch_size):
+        batch = record_batch.to_pandas()
+        batch.index = pd.RangeIndex(n_rows, n_rows + len(batch))
+        batch.attrs = attrs
+        n_rows += len(batch)
+        yield batch
+
+
+def _is_text_or_empty(series: pd.Series) -> bool:
+    """Whether an object column holds only strings and nulls (lossless in Parquet)."""
+    return pd.api.types.infer_dtype(series, skipna=True) in ("string", "empty")
+
+
+def _lossy_columns(df: pd.DataFrame) -> list[str]:
+    """
+    Returns the object columns holding anything other than strings; those would not
+    round-trip through Parquet with the same values and dtypes.
+    """
+    return [
+        col
+        for col in df.columns
+        if df[col].dtype == object and not _is_text_or_empty(df[col])
+    ]
+
+
+def _cache_schema(df: pd.DataFrame) -> pa.Schema:
+    """Arrow schema for a batch; all-null object columns are typed as strings."""
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    fields = [
+        pa.field(field.name, pa.string()) if pa.types.is_null(field.type) else field
+        for field in schema
+    ]
+    return pa.schema(fields, metadata=schema.metadata)
+
+
+def save_frame(df: pd.DataFrame, cache_path: Path, logger: logging.Logger) -> bool:
+    """
+    Writes a DataFrame to the cache atomically (temp file + rename).
+
+    Frames that would not round-trip losslessly are not cached.
+
+    Returns:
+        True if the cache entry was written.
+    """
+    lossy_cols = _lossy_columns(df)
+    if lossy_cols:
+        logger.warning(
+            f"Not caching to {cache_path}: columns {lossy_cols} hold mixed value types."
+        )
+        return False
+
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_suffix(cache_path.suffix + ".tmp")
+    try:
+        df.to_parquet(tmp_path, index=False)
+    except pa.ArrowException as e:
+        tmp_path.unlink(missing_ok=True)
+        logger.warning(f"Not caching to {cache_path}: {e}")
+        return False
+    tmp_path.replace(cache_path)
+    logger.info(f"Cached {len(df)} rows to {cache_path}")
+    return True
+
+
+def write_frame_batches(
+    batches: Iterable[pd.DataFrame], cache_path: Path, logger: logging.Logger
+) -> Iterator[pd.DataFrame]:
+    """
+    Passes batches through unchanged while appending them to a cache entry.
+
+    The entry is published (temp file + rename) only once every batch has been
+    written; if a batch would not round-trip losslessly, or the stream is not
+    consumed to the end, nothing is cached. The attrs of the last batch are stored
+    with the entry.
+    """
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_suffix(cache_path.suffix + ".tmp")
+    writer = None
+    cacheable = True
+    attrs = {}
+    n_rows = 0
+    try:
+        for batch in batches:
+            if cacheable:
+                lossy_cols = _lossy_columns(batch)
+                if lossy_cols:
+                    logger.warning(
+                        f"Not caching to {cache_path}: columns {lossy_cols} hold mixed "
+                        f"value types."
+                    )
+                    cacheable = False
+                else:
+                    try:
+                        if writer is None:
+                            schema = _cache_schema(batch)
+                            writer = pq.ParquetWriter(tmp_path, schema)
+                        writer.write_table(
+                            pa.Table.from_pandas(batch, schema=schema, preserve_index=False)
+                        )
+                    except pa.ArrowException as e:
+                        logger.warning(f"Not caching to {cache_path}: {e}")
+                        cacheable = False
+            attrs = batch.attrs
+            n_rows += len(batch)
+            yield batch
+
+        if cacheable and writer is not None:
+            writer.add_key_value_metadata(
+                {ATTRS_METADATA_KEY: json.dumps(attrs, default=str)}
+            )
+            writer.close()
+            writer = None
+            tmp_path.replace(cache_path)
+            logger.info(f"Cached {n_rows} rows to {cache_path}")
+    finally:
+        if writer is not None:
+            writer.close()
+        tmp_path.unlink(missing_ok=True)
@@ -0,0 +1,144 @@
+"""
+Concept occurrence index of the IFRS taxonomy ETL.
+
+A concept (e.g. `ifrs-full_Revenue`) appears once in every presentation group that
+uses it. The index lists each occurrence (node id, group code, full path, plus the
+sheet name in multi-sheet extracts, where a path is only unique within its sheet)
+grouped by concept name. It is saved as Parquet, sorted by concept with dictionary-encoded
+text columns, and `ConceptIndex` loads it into flat arrays plus a
+concept -> (start, end) table, so finding every occurrence of a concept is one
+dict lookup and an array slice.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import src.etl.transform as transform
+
+INDEX_COLUMNS = ["concept_name", "node_id", "group_code", "full_path"]
+# Only in the index of a multi-sheet extract
+SHEET_COLUMN = "sheet_name"
+
+
+def build_concept_index(df: pd.DataFrame, paths: np.ndarray) -> pd.DataFrame:
+    """
+    Builds the concept index table: one row per occurrence, sorted by concept name
+    and, within a concept, in taxonomy order. Rows without a concept name are left out.
+    Multi-sheet extracts also get the `sheet_name` of each occurrence.
+
+    Args:
+        df: Hierarchy frame (with `node_id`) in taxonomy order.
+        paths: Paths from `tree.full_paths`.
+    """
+    codes, concepts = pd.factorize(df["Concept name"], sort=True)
+    order = np.argsort(codes, kind="stable")
+    order = order[codes[order] >= 0]
+    columns = {
+        "concept_name": pd.Categorical.from_codes(codes[order], categories=concepts),
+        "node_id": df["node_id"].to_numpy(dtype=np.int32)[order],
+        "group_code": pd.Categorical(df["group_code"].to_numpy(dtype=object)[order]),
+        "full_path": pd.array(
+            np.asarray(paths, dtype=object)[order], dtype=transform.STRING_DTYPE
+        ),
+    }
+    if SHEET_COLUMN in df.columns:
+        columns[SHEET_COLUMN] = pd.Categorical(df[SHEET_COLUMN].to_numpy(dtype=object)[order])
+    return pd.DataFrame(columns)
+
+
+class ConceptIndex:
+    """
+    Read-side concept index with O(1) lookups.
+
+    Occurrences are held in flat arrays sorted by concept, so the occurrences of a
+    concept are the contiguous range `bounds[concept]`.
+
+    Usage:
+        index = ConceptIndex.load(output_dir / f"concept_index_{run_id}.parquet")
+        index.node_ids("ifrs-full_Revenue")     # int32 array of node ids
+        index.occurrences("ifrs-full_Revenue")  # [{"node_id", "group_code", "full_path"}]
+
+    Occurrences of a multi-sheet index also hold their `sheet_name`.
+    """
+
+    def __init__(
+        self,
+        concepts: np.ndarray,
+        node_id: np.ndarray,
+        group_code: np.ndarray,
+        full_path: np.ndarray,
+        sheet_name: np.ndarray | None = None,
+    ):
+        self.node_id = node_id.astype(np.int32)
+        self.group_code = group_code
+        self.full_path = full_path
+        self.sheet_name = sheet_name
+
+        # Concepts are sorted, so each one is a single run of equal values
+        codes, uniques = pd.factorize(concepts)
+        starts = np.flatnonzero(np.diff(codes, prepend=-1))
+        ends = np.append(starts[1:], len(codes))
+        self.bounds = dict(zip(uniques.tolist(), zip(starts.tolist(), ends.tolist())))
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "ConceptIndex":
+        """Builds the index from a table returned by `build_concept_index`."""
+        sheet_name = None
+        if SHEET_COLUMN in df.columns:
+            sheet_name = df[SHEET_COLUMN].to_numpy(dtype=object)
+        return cls(
+            df["concept_name"].to_numpy(dtype=object),
+            df["node_id"].to_numpy(dtype=np.int32),
+            df["group_code"].to_numpy(dtype=object),
+            df["full_path"].to_numpy(dtype=object),
+            sheet_name,
+        )
+
+    @classmethod
+    def load(cls, path: Path) -> "ConceptIndex":
+        """Loads a saved concept index (Parquet)."""
+        return cls.from_frame(pd.read_parquet(path))
+
+    def __len__(self) -> int:
+        """Number of distinct concepts."""
+        return len(self.bounds)
+
+    def __contains__(self, concept: str) -> bool:
+        return concept in self.bounds
+
+    def _range(self, concept: str) -> slice:
+        """Slice of a concept's occurrences (empty for an unknown concept)."""
+        return slice(*self.bounds.get(concept, (0, 0)))
+
+    def count(self, concept: str) -> int:
+        """Returns how many times a concept occurs in the taxonomy."""
+        start, end = self.bounds.get(concept, (0, 0))
+        return end - start
+
+    def node_ids(self, concept: str) -> np.ndarray:
+        """Returns the node ids of a concept's occurrences, in taxonomy order."""
+        return self.node_id[self._range(concept)]
+
+    def group_codes(self, concept: str) -> list[str]:
+        """Returns the group code of each occurrence of a concept."""
+        return self.group_code[self._range(concept)].tolist()
+
+    def full_paths(self, concept: str) -> list[str]:
+        """Returns the full path of each occurrence of a concept."""
+        return self.full_path[self._range(concept)].tolist()
+
+    def occurrences(self, concept: str) -> list[dict]:
+        """Returns every occurrence of a concept as a dict of its index fields."""
+        rows = self._range(concept)
+        occurrences = [
+            {"node_id": int(node_id), "group_code": group_code, "full_path": full_path}
+            for node_id, group_code, full_path in zip(
+                self.node_id[rows], self.group_code[rows], self.full_path[rows]
+            )
+        ]
+        if self.sheet_name is not None:
+            for occurrence, sheet_name in zip(occurrences, self.sheet_name[rows]):
+                occurrence[SHEET_COLUMN] = sheet_name
+        return occurrences
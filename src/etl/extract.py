@@ -0,0 +1,530 @@
+"""
+Extract stage of the IFRS taxonomy ETL.
+
+Reads the taxonomy worksheet and returns one record per Excel row, including the
+indent level of the "Preferred label" cell, which carries the presentation hierarchy.
+"""
+
+import logging
+import os
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+
+import pandas as pd
+from openpyxl import load_workbook
+from openpyxl.cell.cell import Cell
+from openpyxl.cell.read_only import EmptyCell, ReadOnlyCell
+
+import src.etl.cache as cache
+import src.etl.xlsx_reader as xlsx_reader
+
+# Supported ways of reading the workbook:
+# - "full": openpyxl in standard mode, every cell object is kept in memory.
+# - "read_only": openpyxl streaming cells, memory stays flat as the sheet grows.
+# - "xml": SAX parse of the worksheet XML, indents resolved from styles.xml.
+EXTRACTION_MODES = ("full", "read_only", "xml")
+
+# Version of the extracted frame layout (columns and dtypes). Part of the extract
+# cache key, so bump it whenever the extract output changes shape.
+EXTRACT_SCHEMA_VERSION = 2
+
+# Rows per DataFrame yielded by iter_extract_batches
+DEFAULT_BATCH_SIZE = 5000
+
+# Columns read from the sheet besides the optional metadata columns
+VALUE_COLUMNS = ["Concept name", "Preferred label", "Type"]
+
+
+def _value_columns(optional_cols: list[str]) -> list[str]:
+    """Returns the cell-value columns to extract, without duplicates."""
+    return list(dict.fromkeys(VALUE_COLUMNS + list(optional_cols)))
+
+
+def _column_plan(
+    headers: list, optional_cols: list[str], sheet_name: str
+) -> dict[str, int | None]:
+    """
+    Maps every column to extract to its position in the header row (None if absent).
+
+    Raises:
+        ValueError: If the "Preferred label" column, which carries the indent, is missing.
+    """
+    if "Preferred label" not in headers:
+        raise ValueError(f"Column 'Preferred label' not found in sheet '{sheet_name}'.")
+    return {
+        col: headers.index(col) if col in headers else None
+        for col in _value_columns(optional_cols)
+    }
+
+
+def _cell_indent(cell: Cell | ReadOnlyCell | EmptyCell) -> int:
+    """Returns the alignment indent of a cell; empty read-only cells have no style."""
+    alignment = cell.alignment
+    if alignment is None:
+        return 0
+    return int(alignment.indent or 0)
+
+
+def _needed_columns(plan: dict[str, int | None]) -> list[int]:
+    """Returns the sorted, distinct header positions that have to be decoded."""
+    return sorted({idx for idx in plan.values() if idx is not None})
+
+
+def _iter_openpyxl_rows(
+    file_path: Path, sheet_name: str, optional_cols: list[str], read_only: bool
+) -> Iterator:
+    """
+    Yields extracted rows using openpyxl cells, in full or read-only mode.
+
+    The first item is the expected number of data rows (from `ws.max_row`); every
+    following item is an (excel_row, indent, values) record.
+    """
+    wb = load_workbook(file_path, read_only=read_only, data_only=True)
+    try:
+        ws = wb[sheet_name]
+        headers = list(next(ws.iter_rows(min_row=1, max_row=1, values_only=True), ()))
+        plan = _column_plan(headers, optional_cols, sheet_name)
+
+        # Only the span of columns we use is read; positions become span-relative
+        needed = _needed_columns(plan)
+        min_col, max_col = needed[0] + 1, needed[-1] + 1
+        label_idx = plan["Preferred label"] - needed[0]
+        value_idxs = [idx - needed[0] if idx is not None else None for idx in plan.values()]
+
+        yield max((ws.max_row or 1) - 1, 0)
+
+        for excel_row_num, r in enumerate(
+            ws.iter_rows(min_row=2, min_col=min_col, max_col=max_col), start=2
+        ):
+            yield (
+                excel_row_num,
+                _cell_indent(r[label_idx]),
+                [r[idx].value if idx is not None else None for idx in value_idxs],
+            )
+    finally:
+        # Read-only workbooks keep the archive open until closed explicitly
+        wb.close()
+
+
+def _iter_xml_rows(
+    file_path: Path, sheet_name: str, optional_cols: list[str]
+) -> Iterator:
+    """
+    Yields extracted rows by parsing the worksheet XML directly.
+
+    Follows the protocol of `_iter_openpyxl_rows`: the expected number of data rows
+    (from the worksheet dimension) first, then (excel_row, indent, values) records.
+    """
+    with xlsx_reader.XlsxSheetReader(file_path, sheet_name) as reader:
+        header_cells = reader.read_row(1)
+        headers = [
+            header_cells[i][0] if i in header_cells else None
+            for i in range(max(header_cells, default=-1) + 1)
+        ]
+        plan = _column_plan(headers, optional_cols, sheet_name)
+        label_idx = plan["Preferred label"]
+        value_idxs = list(plan.values())
+        empty_values = [None] * len(value_idxs)
+
+        # Cells outside the configured columns are never decoded
+        sheet_rows = reader.iter_rows(min_row=2, columns=set(_needed_columns(plan)))
+
+        yield max((reader.max_row or 1) - 1, 0)
+
+        next_row = 2
+        for row_number, cells in sheet_rows:
+            if row_number < next_row:
+                continue
+            # Rows without cells between populated rows are still emitted, as openpyxl does
+            for gap_row in range(next_row, row_number):
+                yield gap_row, 0, empty_values
+            label = cells.get(label_idx)
+            yield (
+                row_number,
+                reader.indent(label[1]) if label is not None else 0,
+                [cells[idx][0] if idx in cells else None for idx in value_idxs],
+            )
+            next_row = row_number + 1
+
+
+def _stop_at_empty_run(
+    records: Iterator, empty_row_stop: int, extent: dict
+) -> Iterator:
+    """
+    Passes records through until `empty_row_stop` consecutive fully-empty rows are
+    seen, then stops reading the sheet. Trailing empty rows are never emitted.
+
+    Worksheets often report a max_row far beyond the data because of formatting;
+    this keeps those rows out of the extract. The row at which reading stopped is
+    recorded in `extent["stopped_at_row"]`.
+    """
+    try:
+        yield next(records)
+
+        pending = []
+        for record in records:
+            if any(value is not None for value in record[2]):
+                yield from pending
+                pending.clear()
+                yield record
+                continue
+            pending.append(record)
+            if len(pending) >= empty_row_stop:
+                extent["stopped_at_row"] = record[0]
+                return
+    finally:
+        records.close()
+
+
+def _accumulate_columns(
+    records: Iterator, value_columns: list[str], size: int
+) -> pd.DataFrame:
+    """
+    Builds an extracted DataFrame column by column from (excel_row, indent, values)
+    records.
+
+    Column buffers are pre-sized to `size` rows and grown only if more records
+    arrive. Row numbers and indents get the nullable Int64 dtype; cell values stay
+    object, since a cell may hold text, numbers or dates.
+    """
+    excel_rows = [0] * size
+    indents = [0] * size
+    values = [[None] * size for _ in value_columns]
+
+    n_rows = 0
+    for excel_row, indent, row_values in records:
+        if n_rows == size:
+            grow = max(size, 1024)
+            excel_rows.extend([0] * grow)
+            indents.extend([0] * grow)
+            for column in values:
+                column.extend([None] * grow)
+            size += grow
+        excel_rows[n_rows] = excel_row
+        indents[n_rows] = indent
+        for column, value in zip(values, row_values):
+            column[n_rows] = value
+        n_rows += 1
+
+    data = {
+        "excel_row": pd.array(excel_rows[:n_rows], dtype="Int64"),
+        "Concept name": None,
+        "Preferred label": None,
+        "indent": pd.array(indents[:n_rows], dtype="Int64"),
+    }
+    for col, column in zip(value_columns, values):
+        data[col] = pd.array(column[:n_rows], dtype=object)
+    return pd.DataFrame(data)
+
+
+def _open_records(
+    file_path: Path,
+    sheet_name: str,
+    optional_cols: list[str],
+    mode: str,
+    empty_row_stop: int,
+    extent: dict,
+) -> Iterator:
+    """Validates the inputs and returns the record source for an extraction mode."""
+    if mode not in EXTRACTION_MODES:
+        raise ValueError(
+            f"Unknown extraction mode '{mode}'. Expected one of {EXTRACTION_MODES}."
+        )
+    if not file_path.exists():
+        raise FileNotFoundError(f"Source workbook not found at {file_path}")
+
+    if mode == "xml":
+        records = _iter_xml_rows(file_path, sheet_name, optional_cols)
+    else:
+        records = _iter_openpyxl_rows(
+            file_path, sheet_name, optional_cols, read_only=mode == "read_only"
+        )
+    if empty_row_stop:
+        records = _stop_at_empty_run(records, empty_row_stop, extent)
+    return records
+
+
+def _log_extent(
+    logger: logging.Logger, sheet_name: str, mode: str, n_rows: int, extent: dict
+) -> None:
+    """Logs the number of extracted rows and where reading stopped."""
+    logger.info(f"Extracted {n_rows} rows from '{sheet_name}' using '{mode}' mode.")
+    if extent["stopped_at_row"] is not None:
+        logger.info(
+            f"Stopped reading at row {extent['stopped_at_row']} after "
+            f"{extent['empty_row_stop']} empty rows; data ends at row "
+            f"{extent['last_data_row']}."
+        )
+
+
+def extract_taxonomy_sheet(
+    file_path: Path,
+    sheet_name: str,
+    optional_cols: list[str],
+    logger: logging.Logger,
+    mode: str = "full",
+    empty_row_stop: int = 0,
+) -> pd.DataFrame:
+    """
+    Extracts the taxonomy rows of a worksheet together with their label indent.
+
+    Args:
+        file_path: Path to the taxonomy workbook.
+        sheet_name: Name of the worksheet to extract.
+        optional_cols: Metadata columns to capture when present in the sheet.
+        logger: Logger used for progress messages.
+        mode: One of EXTRACTION_MODES.
+        empty_row_stop: Stop after this many consecutive empty rows and drop trailing
+            empty rows; 0 reads every row up to the sheet's max_row.
+
+    Returns:
+        A DataFrame with one row per Excel row below the header. The data extent is
+        recorded in `df.attrs["extraction"]` (kept in Parquet caches).
+    """
+    extent = {"empty_row_stop": empty_row_stop, "stopped_at_row": None}
+    records = _open_records(
+        file_path, sheet_name, optional_cols, mode, empty_row_stop, extent
+    )
+    size = next(records)
+    if empty_row_stop:
+        # max_row may lie far beyond the data (formatted cells); start from a batch
+        # worth of rows and let the buffers grow instead of sizing them to max_row
+        size = min(size, DEFAULT_BATCH_SIZE)
+    df = _accumulate_columns(records, _value_columns(optional_cols), size)
+    extent["last_data_row"] = int(df["excel_row"].iloc[-1]) if len(df) else None
+    df.attrs["extraction"] = extent
+
+    _log_extent(logger, sheet_name, mode, len(df), extent)
+    return df
+
+
+def iter_extract_batches(
+    file_path: Path,
+    sheet_name: str,
+    optional_cols: list[str],
+    logger: logging.Logger,
+    mode: str = "full",
+    empty_row_stop: int = 0,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Iterator[pd.DataFrame]:
+    """
+    Extracts the taxonomy rows of a worksheet as a stream of fixed-size batches.
+
+    Takes the same arguments as `extract_taxonomy_sheet`, plus `batch_size`. Each
+    batch is indexed by its position in the sheet extract, so concatenating the
+    batches gives the frame `extract_taxonomy_sheet` returns. Only one batch is
+    built at a time, so memory is bounded by `batch_size` rather than sheet size.
+
+    All batches share one `attrs["extraction"]` dict, which holds the final data
+    extent once the generator is exhausted.
+    """
+    if batch_size < 1:
+        raise ValueError(f"batch_size must be a positive integer, got {batch_size}.")
+
+    extent = {"empty_row_stop": empty_row_stop, "stopped_at_row": None}
+    records = _open_records(
+        file_path, sheet_name, optional_cols, mode, empty_row_stop, extent
+    )
+    next(records)
+    value_columns = _value_columns(optional_cols)
+
+    n_rows = 0
+    try:
+        while True:
+            batch = _accumulate_columns(
+                islice(records, batch_size), value_columns, batch_size
+            )
+            if batch.empty:
+                break
+            batch.index = pd.RangeIndex(n_rows, n_rows + len(batch))
+            n_rows += len(batch)
+            extent["last_data_row"] = int(batch["excel_row"].iloc[-1])
+            batch.attrs["extraction"] = extent
+            yield batch
+            if len(batch) < batch_size:
+                break
+    finally:
+        records.close()
+
+    extent.setdefault("last_data_row", None)
+    _log_extent(logger, sheet_name, mode, n_rows, extent)
+
+
+def extract_sheets(
+    file_path: Path,
+    sheet_names: list[str],
+    optional_cols: list[str],
+    logger: logging.Logger,
+    mode: str = "full",
+    empty_row_stop: int = 0,
+    max_workers: int | None = None,
+) -> dict[str, pd.DataFrame]:
+    """
+    Extracts several worksheets in parallel, one worker process per sheet.
+
+    Args:
+        sheet_names: Worksheets to extract.
+        max_workers: Size of the process pool; None uses one process per CPU.
+        Other arguments as for `extract_taxonomy_sheet`.
+
+    Returns:
+        The extract of every sheet, keyed by sheet name, with a leading
+        `sheet_name` column tagging each row.
+    """
+    n_workers = min(max_workers or os.cpu_count() or 1, len(sheet_names))
+    logger.info(f"Extracting {len(sheet_names)} sheets with {n_workers} worker processes.")
+
+    if n_workers <= 1:
+        frames = {
+            name: extract_taxonomy_sheet(
+                file_path, name, optional_cols, logger, mode, empty_row_stop
+            )
+            for name in sheet_names
+        }
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            futures = {
+                name: pool.submit(
+                    extract_taxonomy_sheet,
+                    file_path,
+                    name,
+                    optional_cols,
+                    logger,
+                    mode,
+                    empty_row_stop,
+                )
+                for name in sheet_names
+            }
+            frames = {name: future.result() for name, future in futures.items()}
+
+    for name, df in frames.items():
+        df.insert(0, "sheet_name", name)
+    return frames
+
+
+def extract_cache_path(
+    cache_dir: Path,
+    file_path: Path,
+    sheet_name: str,
+    optional_cols: list[str],
+    empty_row_stop: int,
+    etl_version: str,
+    tagged: bool = False,
+    mode: str = "full",
+    file_digest: str | None = None,
+) -> Path:
+    """
+    Returns the cache entry for the extract of one sheet (see `cache.cache_key`).
+    The extraction mode is part of the key, so switching modes never reuses an
+    extract read by another mode.
+    """
+    key = cache.cache_key(
+        file_path,
+        {
+            "stage": "extract",
+            "schema_version": EXTRACT_SCHEMA_VERSION,
+            "mode": mode,
+            "sheet_name": sheet_name,
+            "sheet_tagged": tagged,
+            "optional_cols": optional_cols,
+            "empty_row_stop": empty_row_stop,
+            "etl_version": etl_version,
+        },
+        file_digest,
+    )
+    return cache_dir / f"extract_{key}.parquet"
+
+
+def _slice_batches(
+    df: pd.DataFrame, batch_size: int, offset: int
+) -> Iterator[pd.DataFrame]:
+    """Splits a frame into batches indexed from `offset` onwards."""
+    for start in range(0, len(df), batch_size):
+        batch = df.iloc[start:start + batch_size]
+        batch.index = pd.RangeIndex(offset + start, offset + start + len(batch))
+        batch.attrs = df.attrs
+        yield batch
+
+
+def stream_sheets(
+    file_path: Path,
+    sheet_names: list[str],
+    optional_cols: list[str],
+    logger: logging.Logger,
+    mode: str = "full",
+    empty_row_stop: int = 0,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    cache_dir: Path | None = None,
+    etl_version: str = "unknown",
+    max_workers: int | None = None,
+    file_digest: str | None = None,
+) -> tuple[dict[str, str], Iterator[tuple[str, pd.DataFrame]]]:
+    """
+    Opens the extract of one or more sheets as a stream of (sheet name, batch).
+
+    A single sheet is streamed batch by batch from the workbook. Several sheets are
+    extracted in parallel by `extract_sheets`, tagged with a `sheet_name` column and
+    streamed in the configured order; batch indexes run on across sheets. With a
+    `cache_dir`, sheets are read from and written to the extract cache, keyed on
+    `file_digest` (the workbook's `cache.file_sha256`) when given.
+
+    Returns:
+        The cache status of every sheet ("hit", "miss" or "disabled") and the stream.
+    """
+    tagged = len(sheet_names) > 1
+    cache_paths = {}
+    statuses = {}
+    for name in sheet_names:
+        if cache_dir is None:
+            statuses[name] = "disabled"
+            continue
+        cache_paths[name] = extract_cache_path(
+            cache_dir,
+            file_path,
+            name,
+            optional_cols,
+            empty_row_stop,
+            etl_version,
+            tagged,
+            mode,
+            file_digest,
+        )
+        statuses[name] = "hit" if cache_paths[name].exists() else "miss"
+
+    def single_sheet() -> Iterator[tuple[str, pd.DataFrame]]:
+        name = sheet_names[0]
+        if statuses[name] == "hit":
+            logger.info(f"Reading extract of '{name}' from cache {cache_paths[name]}")
+            batches = cache.iter_frame_batches(cache_paths[name], batch_size)
+        else:
+            batches = iter_extract_batches(
+                file_path, name, optional_cols, logger, mode, empty_row_stop, batch_size
+            )
+            if name in cache_paths:
+                batches = cache.write_frame_batches(batches, cache_paths[name], logger)
+        for batch in batches:
+            yield name, batch
+
+    def multi_sheet() -> Iterator[tuple[str, pd.DataFrame]]:
+        missing = [name for name in sheet_names if statuses[name] != "hit"]
+        frames = {}
+        if missing:
+            frames = extract_sheets(
+                file_path, missing, optional_cols, logger, mode, empty_row_stop, max_workers
+            )
+            for name, df in frames.items():
+                if name in cache_paths:
+                    cache.save_frame(df, cache_paths[name], logger)
+
+        offset = 0
+        for name in sheet_names:
+            df = frames.pop(name, None)
+            if df is None:
+                df = cache.load_frame(cache_paths[name], logger)
+            for batch in _slice_batches(df, batch_size, offset):
+                yield name, batch
+            offset += len(df)
+
+    return statuses, single_sheet() if not tagged else multi_sheet()
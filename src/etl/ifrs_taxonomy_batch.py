@@ -0,0 +1,250 @@
+# This script runs the IFRS taxonomy ETL for several source workbooks at once,
+# e.g. the 2023, 2024 and 2025 taxonomy editions.
+# 1. Each `source_files` entry of the pipeline config runs the full pipeline
+#    in its own worker process
+# 2. Outputs and run logs are written to per-edition subdirectories
+# 3. A combined batch run log (JSON + Markdown) summarises every edition
+#
+# Usage:
+#     python -m src.etl.ifrs_taxonomy_batch [--force] [--no-cache] [--workers N]
+#         [--resume] [--from-stage STAGE]
+
+# === STANDARD IMPORTS ===
+import argparse
+import json
+import os
+import socket
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+# Add project root to the Python path
+project_root = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+# === PROJECT IMPORTS ===
+import config.etl_config as etl_config
+import src.etl.ifrs_taxonomy_elt as ifrs_taxonomy_elt
+
+
+# === HELPER FUNCTIONS ===
+def edition_name(source_file_config: dict) -> str:
+    """Returns the edition label of a source file entry (defaults to the file stem)."""
+    edition = source_file_config.get("edition")
+    if edition is None:
+        edition = Path(source_file_config.get("filename", "")).stem
+    return str(edition)
+
+
+def run_edition(
+    project_root: Path,
+    config: dict,
+    source_file_config: dict,
+    force: bool = False,
+    no_cache: bool = False,
+    resume: bool = False,
+    from_stage: str | None = None,
+) -> dict:
+    """
+    Runs the pipeline for one edition; executed in a worker process.
+
+    Outputs go to `output_dir/<edition>` and the edition's logs to `logs_dir/<edition>`.
+
+    Returns:
+        A summary of the edition run for the combined batch run log.
+    """
+    edition = edition_name(source_file_config)
+    paths = ifrs_taxonomy_elt.get_paths(config, project_root)
+    output_dir = paths["output_dir"] / edition
+    logs_dir = paths["logs_dir"] / edition
+    logger = etl_config.setup_logger(
+        f"ifrs_taxonomy_etl_{edition}", logs_dir / "ifrs_taxonomy_etl.log"
+    )
+
+    start = time.perf_counter()
+    run_log, outputs_saved = ifrs_taxonomy_elt.run_pipeline(
+        config,
+        paths,
+        source_file_config,
+        logger,
+        force=force,
+        no_cache=no_cache,
+        output_dir=output_dir,
+        logs_dir=logs_dir,
+        resume=resume,
+        from_stage=from_stage,
+    )
+    return {
+        "edition": edition,
+        "source_file": source_file_config.get("filename"),
+        "status": "completed" if outputs_saved else "qa_failed",
+        "elapsed_seconds": round(time.perf_counter() - start, 2),
+        "output_dir": str(output_dir),
+        "run_log": run_log,
+    }
+
+
+def write_batch_run_log(batch_log: dict, logs_dir: Path, run_id: str) -> tuple[Path, Path]:
+    """Writes the combined run log of a batch as JSON and Markdown."""
+    logs_dir.mkdir(parents=True, exist_ok=True)
+    json_path = logs_dir / f"batch_run_log_{run_id}.json"
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(batch_log, f, indent=2, ensure_ascii=False, default=str)
+
+    md_path = logs_dir / f"batch_run_log_{run_id}.md"
+    metadata = batch_log["batch_metadata"]
+    with open(md_path, "w", encoding="utf-8") as f:
+        f.write("# IFRS Taxonomy ETL Batch Run Log\n\n")
+        f.write(f"**Run ID:** {metadata['run_id']}\n")
+        f.write(f"**Run Date/Time:** {metadata['run_datetime']}\n")
+        f.write(f"**Operator:** {metadata['operator']}\n")
+        f.write(f"**ETL Version:** {metadata['etl_version']}\n")
+        f.write(f"**Environment:** {metadata['environment']}\n")
+        f.write(f"**Workers:** {metadata['workers']}\n")
+        f.write(f"**Force Override:** {metadata['force_override']}\n")
+        f.write(f"**Elapsed Seconds:** {metadata['elapsed_seconds']}\n\n")
+
+        f.write("## Editions\n")
+        f.write("| Edition | Source File | Status | Raw Rows | Hierarchy Rows | QA | Seconds |\n")
+        f.write("|---------|-------------|--------|----------|----------------|----|---------|\n")
+        for entry in batch_log["editions"]:
+            run_log = entry.get("run_log") or {}
+            row_counts = run_log.get("row_counts", {})
+            qa_results = run_log.get("qa_results")
+            if qa_results is None:
+                qa_status = "-"
+            elif all(qa_results.values()):
+                qa_status = "✅ Pass"
+            else:
+                failed = [chk for chk, passed in qa_results.items() if not passed]
+                qa_status = "❌ " + ", ".join(failed)
+            f.write(
+                f"| {entry['edition']} | {entry['source_file']} | {entry['status']} "
+                f"| {row_counts.get('raw_extract', '-')} "
+                f"| {row_counts.get('after_hierarchy', '-')} "
+                f"| {qa_status} | {entry.get('elapsed_seconds', '-')} |\n"
+            )
+        f.write("\n")
+
+        errors = [entry for entry in batch_log["editions"] if entry.get("error")]
+        f.write("## Errors\n")
+        if errors:
+            for entry in errors:
+                f.write(f"- {entry['edition']}: {entry['error']}\n")
+        else:
+            f.write("- None recorded\n")
+    return json_path, md_path
+
+
+# === Batch ETL Pipeline ===
+def main():
+    """Runs the ETL pipeline for every configured source file in a process pool."""
+    # === ARGUMENT PARSER ===
+    parser = argparse.ArgumentParser(description="IFRS Taxonomy ETL (batch of editions)")
+    parser.add_argument(
+        "--force", action="store_true", help="Override fail-fast QA checks"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Re-extract the workbooks even if cached extracts exist",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Editions processed in parallel (default: one per CPU)",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip stages whose checkpointed inputs are unchanged",
+    )
+    parser.add_argument(
+        "--from-stage",
+        choices=ifrs_taxonomy_elt.STAGE_NAMES,
+        default=None,
+        help="Rerun from this stage on, resuming the earlier stages from checkpoints",
+    )
+    args = parser.parse_args()
+
+    project_root = ifrs_taxonomy_elt.get_project_root()
+    temp_logger = etl_config.setup_logger(
+        "etl_setup", project_root / "logs/etl_setup.log"
+    )
+    config = ifrs_taxonomy_elt.load_config(project_root, temp_logger)
+    paths = ifrs_taxonomy_elt.get_paths(config, project_root)
+    logger = etl_config.setup_logger(
+        "ifrs_taxonomy_batch", paths["logs_dir"] / "ifrs_taxonomy_batch.log"
+    )
+
+    source_files = config.get("source_files") or []
+    if not source_files:
+        logger.error("No 'source_files' entries found in configuration.")
+        raise ValueError("Missing 'source_files' in configuration.")
+    editions = [edition_name(entry) for entry in source_files]
+    if len(set(editions)) != len(editions):
+        raise ValueError(f"Duplicate editions in 'source_files': {editions}")
+
+    run_id = datetime.now().strftime("%Y%m%d-%H%M")
+    run_datetime = datetime.now().strftime("%Y-%m-%d %H:%M")
+    workers = min(args.workers or os.cpu_count() or 1, len(source_files))
+    logger.info(f"Batch started: {len(source_files)} editions with {workers} workers.")
+
+    start_time = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(
+                run_edition,
+                project_root,
+                config,
+                entry,
+                args.force,
+                args.no_cache,
+                args.resume,
+                args.from_stage,
+            )
+            for entry in source_files
+        ]
+        for edition, entry, future in zip(editions, source_files, futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                logger.error(f"Edition {edition} failed: {e!r}")
+                result = {
+                    "edition": edition,
+                    "source_file": entry.get("filename"),
+                    "status": "error",
+                    "error": repr(e),
+                    "run_log": None,
+                }
+            logger.info(f"Edition {edition}: {result['status']}")
+            results.append(result)
+    elapsed = time.perf_counter() - start_time
+
+    batch_log = {
+        "batch_metadata": {
+            "run_id": run_id,
+            "run_datetime": run_datetime,
+            "operator": config.get("operator", "Automated ETL Pipeline"),
+            "etl_version": config.get("etl_version", "unknown"),
+            "environment": socket.gethostname(),
+            "workers": workers,
+            "force_override": args.force,
+            "elapsed_seconds": round(elapsed, 2),
+        },
+        "editions": results,
+    }
+    json_path, md_path = write_batch_run_log(batch_log, paths["logs_dir"], run_id)
+    logger.info(f"Batch run logs saved as:\n- {json_path}\n- {md_path}")
+    logger.info(f"Batch completed in {elapsed:.2f} seconds.")
+
+    if any(result["status"] != "completed" for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,12 +3,15 @@
 # 1. Run Log directly built into your ETL pipeline
 # 2. Automated QA checks with fail-fast or force override option
 # 3. Saving outputs as CSV/JSON for sharing and Pickle for local use
+# 4. Named stages checkpointed to data/intermediate/, resumable with --resume or
+#    --from-stage
 
 # === STANDARD IMPORTS ===
 import re
+import hashlib
 import json
+import numpy as np
 import pandas as pd
-from openpyxl import load_workbook
 from datetime import datetime
 import socket
 from pathlib import Path
@@ -26,6 +29,18 @@ sys.path.insert(0, str(project_root))
 
 # === PROJECT IMPORTS ===
 import config.etl_config as etl_config
+import src.etl.cache as cache
+import src.etl.concept_index as concept_index
+import src.etl.extract as extract
+import src.etl.partition as partition
+import src.etl.polars_engine as polars_engine
+import src.etl.profiling as profiling
+import src.etl.stages as stages
+import src.etl.transform as transform
+import src.etl.tree as tree
+
+# Engines available for the columnar grouping, cleaning and QA stages
+ENGINES = ("pandas", "polars")
 
 
 # === HELPER FUNCTIONS ===
@@ -54,6 +69,16 @@ def get_paths(config: dict, project_root: Path) -> dict:
     return paths
 
 
+def get_engine(config: dict) -> str:
+    """Returns the transform engine from the config ("pandas" by default)."""
+    engine = config.get("engine", "pandas")
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine '{engine}'; expected one of {ENGINES}")
+    if engine == "polars":
+        polars_engine.require_polars()
+    return engine
+
+
 def load_data(paths: dict, logger: logging.Logger) -> pd.DataFrame:
     """Loads data from the specified input path."""
     input_path = paths.get("input_data")
@@ -64,154 +89,138 @@ def load_data(paths: dict, logger: logging.Logger) -> pd.DataFrame:
     return df
 
 
-# === Main ETL Pipeline ===
-def main():
-    """Main function to run the ETL pipeline."""
-    # Get project root
-    project_root = get_project_root()
+# === PIPELINE STAGES ===
+# Every stage is called as stage(context, **inputs) and returns its outputs; the
+# stage table at the end of this block declares inputs, outputs and the config
+# entries each stage reads (see src/etl/stages.py).
+def stage_extract(context: dict, workbook: Path) -> dict:
+    """
+    SECTIONS 1 & 2: streams the configured sheets out of the workbook through the
+    group-header and label-cleaning transforms. Batches flow from the extractor
+    through the row-local transforms, so only one batch of raw rows is held in
+    memory at a time and only the cleaned frame is kept.
+    """
+    config = context["config"]
+    logger = context["logger"]
+    sheet_names = context["sheet_names"]
+    extract_seconds = 0.0
+    grouping_seconds = 0.0
 
-    # Setup a temporary logger for initial setup
-    temp_logger = etl_config.setup_logger(
-        "etl_setup", project_root / "logs/etl_setup.log"
+    # Optional metadata columns we want to capture
+    optional_cols = config.get("optional_cols", [])
+    extraction_config = config.get("extraction", {})
+    extraction_mode = extraction_config.get("mode", "full")
+
+    # Reuse the previous extract when the workbook and extraction inputs are unchanged
+    cache_enabled = extraction_config.get("cache", False) and not context["no_cache"]
+    extract_cache_status, sheet_batches = extract.stream_sheets(
+        workbook,
+        sheet_names,
+        optional_cols,
+        logger,
+        mode=extraction_mode,
+        empty_row_stop=extraction_config.get("empty_row_stop", 0),
+        batch_size=extraction_config.get("batch_size", extract.DEFAULT_BATCH_SIZE),
+        cache_dir=context["paths"]["intermediate_dir"] if cache_enabled else None,
+        etl_version=config.get("etl_version", "unknown"),
+        max_workers=extraction_config.get("workers"),
+        file_digest=context["workbook_sha256"],
     )
-    # Load configuration
-    config = load_config(project_root, temp_logger)
-    # Get paths
-    paths = get_paths(config, project_root)
-
-    # Setup the main application logger using config paths
-    log_path = paths["logs_dir"] / "ifrs_taxonomy_etl.log"
-    logger = etl_config.setup_logger("ifrs_taxonomy_etl", log_path)
-
-    logger.info("ETL process started.")
-
-    # Record start time
-    start_time = time.perf_counter()
-
-    # File and sheet details
-    source_file_config = config.get("source_file", {})
-    filename = source_file_config.get("filename")
-    sheet_name = source_file_config.get("sheet_name")
-
-    if not filename:
-        logger.error("Filename not found in configuration under 'source_file'.")
-        raise ValueError("Missing 'filename' in configuration.")
-
-    file_path = paths["input_dir"] / filename
 
-    # === RUN METADATA ===
-    run_id = datetime.now().strftime("%Y%m%d-%H%M")
-    run_datetime = datetime.now().strftime("%Y-%m-%d %H:%M")
-    operator = config.get("operator", "Automated ETL Pipeline")
-    environment = socket.gethostname()
-
-    # === SECTION 1: EXTRACT ===
-    extract_start = time.perf_counter()
-
-    wb = load_workbook(file_path, data_only=True)
-    ws = wb[sheet_name]
-    headers = [
-        cell.value
-        for cell in next(ws.iter_rows(min_row=1, max_row=1, values_only=False))
-    ]
+    # Dtype policy: text columns become Arrow strings as they are extracted, the
+    # low-cardinality ones categoricals once the whole frame is assembled
+    dtype_policy = config.get("dtypes", {})
+    text_dtypes = {"string": dtype_policy.get("string", [])}
 
-    preferred_label_idx = headers.index("Preferred label")
-    concept_name_idx = (
-        headers.index("Concept name") if "Concept name" in headers else None
+    # Pattern to identify group headers, tried only on rows starting with the prefix
+    header_pattern = re.compile(
+        config.get("header_pattern", transform.DEFAULT_HEADER_PATTERN)
     )
-    type_idx = headers.index("Type") if "Type" in headers else None
+    if header_pattern.groups != 2:
+        raise ValueError(
+            f"header_pattern must have two groups (code, name): {header_pattern.pattern}"
+        )
+    header_prefix = config.get("header_prefix", transform.DEFAULT_HEADER_PREFIX)
+
+    use_polars = get_engine(config) == "polars"
+
+    row_count_raw = 0
+    extraction_extent = {}
+    current_sheet = None
+    group_carry = None
+    cleaned_batches = []
+    batch_start = time.perf_counter()
+    for batch_sheet, batch in sheet_batches:
+        transform_start = time.perf_counter()
+        extract_seconds += transform_start - batch_start
+        row_count_raw += len(batch)
+        extraction_extent[batch_sheet] = batch.attrs.get("extraction", {})
+
+        # Group headers do not carry over from one sheet to the next
+        if batch_sheet != current_sheet:
+            current_sheet = batch_sheet
+            group_carry = None
+        batch = transform.apply_dtypes(batch, text_dtypes)
+        if use_polars:
+            # Group headers and cleaning as one lazy plan per batch
+            df_cleaned, group_carry = polars_engine.group_and_clean(
+                batch, header_pattern, group_carry, header_prefix
+            )
+        else:
+            df_grouped, group_carry = transform.assign_group_headers(
+                batch, header_pattern, group_carry, header_prefix
+            )
+            df_cleaned = transform.clean_labels(df_grouped)
+        cleaned_batches.append(df_cleaned)
 
-    # Optional metadata columns we want to capture
-    optional_cols = config.get("optional_cols", [])
+        batch_start = time.perf_counter()
+        grouping_seconds += batch_start - transform_start
+    extract_seconds += time.perf_counter() - batch_start
 
-    # Find indexes for all optional columns if present
-    col_indexes = {}
-    for col in optional_cols:
-        col_indexes[col] = headers.index(col) if col in headers else None
-
-    # Extract rows with indent + governance row number
-    rows = []
-    for excel_row_num, r in enumerate(
-        ws.iter_rows(min_row=2, values_only=False), start=2
-    ):
-        label_cell = r[preferred_label_idx]
-        row_data = {
-            "excel_row": excel_row_num,
-            "Concept name": (
-                r[concept_name_idx].value if concept_name_idx is not None else None
-            ),
-            "Preferred label": label_cell.value,
-            "indent": int(label_cell.alignment.indent or 0),
-            "Type": r[type_idx].value if type_idx is not None else None,
-        }
-        # Add optional columns if present
-        for col, idx in col_indexes.items():
-            row_data[col] = r[idx].value if idx is not None else None
-        rows.append(row_data)
-
-    df_original = pd.DataFrame(rows)
-    row_count_raw = len(df_original)
-    extract_end = time.perf_counter()
+    if not cleaned_batches:
+        raise ValueError(f"No rows extracted from sheets {sheet_names} of {workbook}")
+    logger.info(f"Data extracted: {row_count_raw} rows in {extract_seconds:.2f} seconds.")
+
+    df_cleaned = transform.apply_dtypes(pd.concat(cleaned_batches), dtype_policy)
+    del cleaned_batches
     logger.info(
-        f"Data extracted: {row_count_raw} rows in {extract_end - extract_start:.2f} seconds."
+        f"Data grouped and cleaned: {len(df_cleaned)} rows in "
+        f"{grouping_seconds:.2f} seconds."
     )
 
-    # === SECTION 2: GROUP HEADERS ===
-    grouping_start = time.perf_counter()
-
-    # Pattern to identify group headers. TODO: Load from config in v2 if needed.
-    header_pattern = re.compile(r"^\[(\d{6})\]\s*(.*)")
-
-    df_grouped = df_original.copy()
-    df_grouped[["group_code", "group_name"]] = df_grouped["Concept name"].str.extract(
-        header_pattern
-    )
-    df_grouped["group_code"] = df_grouped["group_code"].ffill()
-    df_grouped["group_name"] = df_grouped["group_name"].ffill()
-    row_count_grouped = len(df_grouped)
-
-    # === SECTION 2: CLEAN LABELS & ABSTRACT TYPE ===
-    df_cleaned = df_grouped.copy()
-    df_cleaned["label_clean"] = df_cleaned["Preferred label"].astype(str).str.strip()
-    is_abstract = df_cleaned["Type"].isna() & df_cleaned["label_clean"].str.contains(
-        "[abstract]", regex=False
-    )
-    df_cleaned.loc[is_abstract, "Type"] = "abstract"
-    df_cleaned = df_cleaned[df_cleaned["Type"].notna()].copy()
-    row_count_cleaned = len(df_cleaned)
+    # Single-sheet runs report the sheet's values directly, multi-sheet runs per sheet
+    if not context["multi_sheet"]:
+        sheet_name = sheet_names[0]
+        extract_info = {
+            "sheet_label": sheet_name,
+            "extract_cache": extract_cache_status[sheet_name],
+            "last_data_row": extraction_extent[sheet_name].get("last_data_row"),
+            "empty_row_cutoff": extraction_extent[sheet_name].get("stopped_at_row"),
+        }
+    else:
+        extract_info = {
+            "sheet_label": sheet_names,
+            "extract_cache": extract_cache_status,
+            "last_data_row": {
+                name: extent.get("last_data_row")
+                for name, extent in extraction_extent.items()
+            },
+            "empty_row_cutoff": {
+                name: extent.get("stopped_at_row")
+                for name, extent in extraction_extent.items()
+            },
+        }
+    extract_info["extraction_mode"] = extraction_mode
+    extract_info["row_count_raw"] = row_count_raw
+    return {"df_cleaned": df_cleaned, "extract_info": extract_info}
 
-    grouping_end = time.perf_counter()
-    logger.info(
-        f"Data grouped and cleaned: {row_count_cleaned} rows in "
-        f"{grouping_end - grouping_start:.2f} seconds."
-    )
 
-    # === SECTION 3: BUILD HIERARCHY ===
+def stage_hierarchy(context: dict, df_cleaned: pd.DataFrame) -> dict:
+    """SECTION 3: links every row to its parent and arranges the hierarchy columns."""
+    config = context["config"]
+    logger = context["logger"]
     hierarchy_start = time.perf_counter()
 
-    def build_hierarchy(df, max_levels=5):
-        parent_stack = []
-        parent_concepts = []
-        level_columns = {f"Level_{i + 1}": [] for i in range(max_levels)}
-        for _, row in df.iterrows():
-            level = row["indent"]
-            concept_name = row["Concept name"]
-            label = row["label_clean"]
-            while parent_stack and parent_stack[-1][0] >= level:
-                parent_stack.pop()
-            parent_concept = parent_stack[-1][1] if parent_stack else None
-            parent_concepts.append(parent_concept)
-            for i in range(max_levels):
-                if i < len(parent_stack):
-                    level_columns[f"Level_{i + 1}"].append(parent_stack[i][2])
-                else:
-                    level_columns[f"Level_{i + 1}"].append(None)
-            parent_stack.append((level, concept_name, label))
-        df["parent_concept"] = parent_concepts
-        for col, values in level_columns.items():
-            df[col] = values
-        return df
-
     # Get max hierarchy levels from config, with a fallback.
     # The dynamic calculation is still useful for validation or as a default.
     max_levels_from_config = config.get("max_hierarchy_levels", 5)  # Default to 5
@@ -225,156 +234,217 @@ def main():
         )
     max_levels = max_levels_from_config
 
-    df_hierarchy = build_hierarchy(df_cleaned, max_levels=max_levels)
+    # Level_ columns are only built when requested, parent_concept covers the rest
+    level_cols = []
+    if config.get("level_columns", False):
+        level_cols = [f"Level_{i + 1}" for i in range(max_levels)]
+
+    # Optionally link each group on its own, with paths and per-group QA, in a pool
+    transform_config = config.get("transform", {})
+    full_paths = None
+    group_qa = []
+    if transform_config.get("partition_by_group", False):
+        df_hierarchy, parent_index, full_paths, group_qa = partition.build_hierarchy_by_group(
+            df_cleaned,
+            logger,
+            level_columns=len(level_cols),
+            max_workers=transform_config.get("workers"),
+        )
+    else:
+        df_hierarchy, parent_index = transform.build_hierarchy(
+            df_cleaned, level_columns=len(level_cols)
+        )
+    df_hierarchy = transform.apply_dtypes(df_hierarchy, config.get("dtypes", {}))
 
-    # Remove Level_ columns since we have parent_concept
-    level_cols = [col for col in df_hierarchy.columns if col.startswith("Level_")]
-    df_hierarchy.drop(columns=level_cols, inplace=True)
+    # Group fingerprints, compared with the last saved run's in the run log
+    group_fingerprints = None
+    if transform_config.get("changed_groups", False):
+        group_fingerprints = partition.group_fingerprints(df_cleaned)
 
     # Arrange columns: Taxonomy info first, then ELT data
     df_hierarchy_cols_order = config.get("df_hierarchy_cols_order", [])
+    if context["multi_sheet"]:
+        df_hierarchy_cols_order = df_hierarchy_cols_order + ["sheet_name"]
+    df_hierarchy_cols_order = df_hierarchy_cols_order + level_cols
     df_hierarchy = df_hierarchy[df_hierarchy_cols_order]
 
-    # Count rows in the hierarchy DataFrame after final column arrangement for QA checks
-    row_count_hierarchy = len(df_hierarchy)
-
     hierarchy_end = time.perf_counter()
     logger.info(
-        f"Hierarchy built: {row_count_hierarchy} rows in "
+        f"Hierarchy built: {len(df_hierarchy)} rows in "
         f"{hierarchy_end - hierarchy_start:.2f} seconds."
     )
+    return {
+        "df_hierarchy": df_hierarchy,
+        "parent_index": parent_index,
+        "full_paths": full_paths,
+        "group_qa": group_qa,
+        "group_fingerprints": group_fingerprints,
+    }
 
-    # === SECTION 4: FULL PATH & MATERIALIZED PATH TABLE ===
-    fullpath_start = time.perf_counter()
-
-    def df_to_tree(df):
-        root = []
-        stack = [(-1, root, "")]
-        for _, row in df.iterrows():
-            base_path = row["group_name"] or row["group_code"] or ""
-            if not stack[-1][2] or stack[-1][2].startswith(base_path):
-                current_path = base_path + (
-                    " > " + row["label_clean"] if row["label_clean"] else ""
-                )
-            else:
-                current_path = stack[-1][2] + " > " + row["label_clean"]
-            # v2: Include all fields in the node
-            node = {
-                "excel_row": row["excel_row"],
-                "concept_name": row["Concept name"],
-                "preferred_label": row["Preferred label"],
-                "label": row["label_clean"],
-                "group_code": row["group_code"],
-                "group_name": row["group_name"],
-                "type": row["Type"],
-                "full_path": current_path,
-                "standard_label": row.get("Standard label"),
-                "documentation_label": row.get("Documentation label"),
-                "guidance_label": row.get("Guidance label"),
-                "references": row.get("References"),
-                "reference_links": row.get("Reference Links"),
-                "children": [],
-            }
-            level = row["indent"]
-            while stack and stack[-1][0] >= level:
-                stack.pop()
-            stack[-1][1].append(node)
-            stack.append((level, node["children"], current_path))
-        return root
-
-    taxonomy_tree: list[dict] = df_to_tree(df_hierarchy)
-
-    def flatten_tree_to_table(tree):
-        flat_rows = []
-
-        def recurse(nodes):
-            for node in nodes:
-                # Include all fields in the flat rows
-                flat_rows.append(
-                    {
-                        "full_path": node["full_path"],
-                        "excel_row": node["excel_row"],
-                        "concept_name": node["concept_name"],
-                        "preferred_label": node["preferred_label"],
-                        "label": node["label"],
-                        "group_code": node["group_code"],
-                        "group_name": node["group_name"],
-                        "type": node["type"],
-                        "standard_label": node.get("standard_label"),
-                        "documentation_label": node.get("documentation_label"),
-                        "guidance_label": node.get("guidance_label"),
-                        "references": node.get("references"),
-                        "reference_links": node.get("reference_links"),
-                    }
-                )
-                recurse(node["children"])
 
-        recurse(tree)
-        return pd.DataFrame(flat_rows)
+def stage_paths(
+    context: dict,
+    df_hierarchy: pd.DataFrame,
+    parent_index: np.ndarray,
+    full_paths: np.ndarray | None,
+) -> dict:
+    """SECTION 4: full paths, the materialized path table and the optional tree/closure."""
+    logger = context["logger"]
+    outputs_config = context["config"].get("outputs", {})
+    fullpath_start = time.perf_counter()
 
-    df_materialized_path = flatten_tree_to_table(taxonomy_tree)
-    row_count_materialized = len(df_materialized_path)
+    # Paths are joined down the parent positions; no nested tree is needed for them
+    if full_paths is None:
+        full_paths = tree.full_paths(df_hierarchy, parent_index)
+    df_materialized_path = tree.materialized_path_table(df_hierarchy, full_paths)
 
     fullpath_end = time.perf_counter()
     logger.info(
-        f"Materialized path built: {row_count_materialized} rows in "
+        f"Materialized path built: {len(df_materialized_path)} rows in "
         f"{fullpath_end - fullpath_start:.2f} seconds."
     )
 
-    # === ARGUMENT PARSER ===
-    parser = argparse.ArgumentParser(description="IFRS Taxonomy ETL")
-    parser.add_argument(
-        "--force", action="store_true", help="Override fail-fast QA checks"
-    )
-    args = parser.parse_args()
+    # The nested tree is only built when its output is requested
+    taxonomy_tree = None
+    if outputs_config.get("taxonomy_tree", True):
+        tree_start = time.perf_counter()
+        taxonomy_tree = tree.build_tree(df_hierarchy, parent_index, full_paths)
+        logger.info(
+            f"Taxonomy tree built in {time.perf_counter() - tree_start:.2f} seconds."
+        )
 
-    # === SECTION 5: AUTOMATED QA CHECKS ===
-    qa_start = time.perf_counter()
+    # Closure table (ancestor, descendant, distance), only when requested
+    df_closure = None
+    if outputs_config.get("closure_table", False):
+        closure_start = time.perf_counter()
+        df_closure = tree.closure_table(parent_index)
+        logger.info(
+            f"Closure table built: {len(df_closure)} rows in "
+            f"{time.perf_counter() - closure_start:.2f} seconds."
+        )
 
-    qa_results = {
-        "all_have_group_info": df_hierarchy["group_code"].notna().all()
-        and df_hierarchy["group_name"].notna().all(),
-        "indent_matches_int": pd.api.types.is_integer_dtype(df_hierarchy["indent"]),
-        "no_empty_labels_unless_abstract": df_hierarchy.loc[
-            df_hierarchy["Type"] != "abstract", "label_clean"
-        ]
-        .notna()
-        .all(),
-        "unique_full_path": df_materialized_path["full_path"].is_unique,
+    # Concept occurrence index (concept -> node ids, group codes, full paths)
+    df_concept_index = None
+    if outputs_config.get("concept_index", True):
+        index_start = time.perf_counter()
+        df_concept_index = concept_index.build_concept_index(df_hierarchy, full_paths)
+        logger.info(
+            f"Concept index built: {len(df_concept_index)} occurrences of "
+            f"{df_concept_index['concept_name'].nunique()} concepts in "
+            f"{time.perf_counter() - index_start:.2f} seconds."
+        )
+    return {
+        "df_materialized_path": df_materialized_path,
+        "taxonomy_tree": taxonomy_tree,
+        "df_closure": df_closure,
+        "df_concept_index": df_concept_index,
     }
 
+
+def stage_qa(
+    context: dict,
+    df_hierarchy: pd.DataFrame,
+    df_materialized_path: pd.DataFrame,
+    group_qa: list[dict],
+) -> dict:
+    """SECTION 5: automated QA checks."""
+    config = context["config"]
+    qa_start = time.perf_counter()
+
+    if get_engine(config) == "polars":
+        qa_results = polars_engine.qa_results(df_hierarchy, df_materialized_path)
+    else:
+        qa_results = transform.qa_results(df_hierarchy, df_materialized_path)
+
+    # Convert all QA results to native Python bool
+    # Python 3.13 and later: the built-in json module does not serialize NumPy or pandas
+    # types like numpy.bool_ or pd.BooleanDtype directly as JSON booleans
+    qa_results = {k: bool(v) for k, v in qa_results.items()}
+
     # Define critical checks that must pass for fail-fast mode
     critical_checks = config.get("critical_checks", [])
 
     failed_critical = [chk for chk in critical_checks if not qa_results[chk]]
 
+    # Per-group check failures from the partitioned transform
+    anomalies = [
+        f"Group {group['group_code']}: {check} failed"
+        for group in group_qa
+        for check, passed in group["qa"].items()
+        if not passed
+    ]
+
     qa_end = time.perf_counter()
-    logger.info(f"QA checks completed in {qa_end - qa_start:.2f} seconds.")
+    context["logger"].info(f"QA checks completed in {qa_end - qa_start:.2f} seconds.")
+    return {
+        "qa_results": qa_results,
+        "failed_critical": failed_critical,
+        "anomalies": anomalies,
+    }
+
 
-    # === SECTION 6: BUILD RUN LOG ===
+def stage_runlog(
+    context: dict,
+    extract_info: dict,
+    df_hierarchy: pd.DataFrame,
+    df_materialized_path: pd.DataFrame,
+    df_closure: pd.DataFrame | None,
+    qa_results: dict,
+    anomalies: list[str],
+    group_fingerprints: dict[str, str] | None,
+) -> dict:
+    """SECTION 6: builds the run log and saves it as JSON and Markdown."""
+    config = context["config"]
+    logger = context["logger"]
+    logs_dir = context["logs_dir"]
+    run_id = context["run_id"]
     run_log_start = time.perf_counter()
     __version__ = config.get("etl_version", "unknown")
 
+    # Groups changed since the fingerprints saved with the last outputs
+    changed_groups = None
+    if group_fingerprints is not None:
+        previous = partition.load_group_fingerprints(context["output_dir"], __version__, logger)
+        if previous is None:
+            logger.info("No saved group fingerprints: changed groups not reported.")
+        else:
+            changed_groups = partition.changed_groups(previous, group_fingerprints)
+            logger.info(
+                "Groups since the last saved run: "
+                + ", ".join(f"{len(keys)} {kind}" for kind, keys in changed_groups.items())
+                + f" (of {len(group_fingerprints)})."
+            )
+
+    row_count_raw = extract_info["row_count_raw"]
     run_log = {
         "run_metadata": {
             "run_id": run_id,
-            "run_datetime": run_datetime,
-            "operator": operator,
-            "source_file": Path(file_path).name,
-            "sheet_name": sheet_name,
+            "run_datetime": context["run_datetime"],
+            "operator": context["operator"],
+            "source_file": context["file_path"].name,
+            "sheet_name": extract_info["sheet_label"],
+            "extraction_mode": extract_info["extraction_mode"],
+            "extract_cache": extract_info["extract_cache"],
+            "last_data_row": extract_info["last_data_row"],
+            "empty_row_cutoff": extract_info["empty_row_cutoff"],
             "etl_version": __version__,
-            "environment": environment,
-            "force_override": args.force,  # record if force was used
+            "environment": context["environment"],
+            "force_override": context["force"],  # record if force was used
         },
         "row_counts": {
             "raw_extract": row_count_raw,
-            "after_group_headers": row_count_grouped,
-            "after_cleaning": row_count_cleaned,
-            "after_hierarchy": row_count_hierarchy,
-            "materialized_path": row_count_materialized,
+            # Grouping keeps every row, so the grouped count equals the raw count
+            "after_group_headers": row_count_raw,
+            # The hierarchy keeps every cleaned row
+            "after_cleaning": len(df_hierarchy),
+            "after_hierarchy": len(df_hierarchy),
+            "materialized_path": len(df_materialized_path),
+            **({"closure_table": len(df_closure)} if df_closure is not None else {}),
         },
         "qa_results": qa_results,
-        "anomalies": [],
+        **({"changed_groups": changed_groups} if changed_groups is not None else {}),
+        "peak_memory_mib": context["memory"].peaks_mib,
+        "anomalies": anomalies,
         "sign_off": {"etl_operator": None, "reviewer": None},
     }
 
@@ -384,19 +454,8 @@ def main():
     # === SAVE JSON RUN LOG ===
     json_start = time.perf_counter()
 
-    json_path = paths["logs_dir"] / f"run_log_{run_id}.json"
-
-    # Convert all QA results to native Python bool
-    # Python 3.13 and later: the built-in json module does not serialize NumPy or pandas
-    # types like numpy.bool_ or pd.BooleanDtype directly as JSON booleans
-    if isinstance(run_log["qa_results"], dict):
-        run_log["qa_results"] = {k: bool(v) for k, v in run_log["qa_results"].items()}
-    else:
-        raise TypeError(
-            "run_log['qa_results'] must be a dict, got {}".format(
-                type(run_log["qa_results"])
-            )
-        )
+    logs_dir.mkdir(parents=True, exist_ok=True)
+    json_path = logs_dir / f"run_log_{run_id}.json"
 
     with open(json_path, "w", encoding="utf-8") as f:
         json.dump(run_log, f, indent=2, ensure_ascii=False)
@@ -407,7 +466,7 @@ def main():
     # === SAVE MARKDOWN RUN LOG ===
     run_log_start = time.perf_counter()
 
-    md_path = paths["logs_dir"] / f"run_log_{run_id}.md"
+    md_path = logs_dir / f"run_log_{run_id}.md"
     with open(md_path, "w", encoding="utf-8") as f:
         f.write("# IFRS Taxonomy ETL Run Log\n\n")
         f.write(f"**Run ID:** {run_log['run_metadata']['run_id']}\n")
@@ -415,6 +474,14 @@ def main():
         f.write(f"**Operator:** {run_log['run_metadata']['operator']}\n")
         f.write(f"**Source File:** {run_log['run_metadata']['source_file']}\n")
         f.write(f"**Sheet Name:** {run_log['run_metadata']['sheet_name']}\n")
+        f.write(
+            f"**Extraction Mode:** {run_log['run_metadata']['extraction_mode']}\n"
+        )
+        f.write(f"**Extract Cache:** {run_log['run_metadata']['extract_cache']}\n")
+        f.write(f"**Last Data Row:** {run_log['run_metadata']['last_data_row']}\n")
+        f.write(
+            f"**Empty Row Cutoff:** {run_log['run_metadata']['empty_row_cutoff']}\n"
+        )
         f.write(f"**ETL Version:** {run_log['run_metadata']['etl_version']}\n")
         f.write(f"**Environment:** {run_log['run_metadata']['environment']}\n")
         f.write(f"**Force Override:** {run_log['run_metadata']['force_override']}\n\n")
@@ -433,6 +500,21 @@ def main():
             f.write(f"- {check.replace('_', ' ').title()}: {status}\n")
         f.write("\n")
 
+        if changed_groups is not None:
+            f.write("## Changed Groups\n")
+            for kind, keys in changed_groups.items():
+                f.write(f"- **{kind.title()}:** {', '.join(keys) or 'None'}\n")
+            f.write("\n")
+
+        if run_log["peak_memory_mib"]:
+            f.write("## Peak Memory (MiB)\n")
+            for stage, peaks in run_log["peak_memory_mib"].items():
+                f.write(
+                    f"- **{stage.replace('_', ' ').title()}:** {peaks['traced']} traced, "
+                    f"{peaks['arrow']} Arrow, {peaks['rss']} RSS\n"
+                )
+            f.write("\n")
+
         f.write("## Anomalies & Exceptions\n")
         if run_log["anomalies"]:
             for anomaly in run_log["anomalies"]:
@@ -453,15 +535,33 @@ def main():
     logger.info(
         f"Run log saved as Markdown in {run_log_end - run_log_start:.2f} seconds."
     )
+    return {"run_log": run_log}
+
+
+def stage_outputs(
+    context: dict,
+    df_hierarchy: pd.DataFrame,
+    df_materialized_path: pd.DataFrame,
+    taxonomy_tree: list | None,
+    df_closure: pd.DataFrame | None,
+    df_concept_index: pd.DataFrame | None,
+    group_fingerprints: dict[str, str] | None,
+    failed_critical: list[str],
+) -> dict:
+    """Fail-fast on critical QA checks, otherwise saves the outputs."""
+    config = context["config"]
+    logger = context["logger"]
+    output_dir = context["output_dir"]
+    run_id = context["run_id"]
 
     # === FAIL-FAST OR FORCE ===
-    if failed_critical and not args.force:
+    if failed_critical and not context["force"]:
         print("\n❌ CRITICAL QA CHECKS FAILED ❌")
         for chk in failed_critical:
             print(f"- {chk} failed")
         print("\nETL aborted before producing downstream outputs.")
-        sys.exit(1)
-    elif failed_critical and args.force:
+        return {"outputs_saved": False}
+    elif failed_critical and context["force"]:
         print("\n⚠️ Force override enabled — continuing despite failed QA checks:")
         for chk in failed_critical:
             print(f"- {chk} failed")
@@ -471,8 +571,7 @@ def main():
         )
 
     # === SAVE OUTPUTS (only if QA passed or force override) ===
-    output_dir = paths["output_dir"]
-    output_dir.mkdir(exist_ok=True)
+    output_dir.mkdir(parents=True, exist_ok=True)
 
     # Save hierarchy DataFrame
 
@@ -506,24 +605,303 @@ def main():
         f"{df_materialized_path_end - df_materialized_path_start:.2f} seconds."
     )
 
+    # Save closure table: CSV for sharing, Parquet for columnar loads
+    if df_closure is not None:
+        df_closure_start = time.perf_counter()
+        df_closure.to_csv(
+            output_dir / f"df_closure_{run_id}.csv", index=False, encoding="utf-8"
+        )
+        df_closure.to_parquet(output_dir / f"df_closure_{run_id}.parquet", index=False)
+
+        df_closure_end = time.perf_counter()
+        logger.info(
+            f"Closure table saved in {df_closure_end - df_closure_start:.2f} seconds."
+        )
+
+    # Save concept index: Parquet only, read back with concept_index.ConceptIndex.load
+    if df_concept_index is not None:
+        index_start = time.perf_counter()
+        df_concept_index.to_parquet(
+            output_dir / f"concept_index_{run_id}.parquet", index=False
+        )
+        logger.info(
+            f"Concept index saved in {time.perf_counter() - index_start:.2f} seconds."
+        )
+
     # Save taxonomy tree JSON
-    json_start = time.perf_counter()
+    if taxonomy_tree is not None:
+        json_start = time.perf_counter()
 
-    with open(output_dir / f"taxonomy_tree_{run_id}.json", "w", encoding="utf-8") as f:
-        json.dump(taxonomy_tree, f, indent=2, ensure_ascii=False)
+        with open(
+            output_dir / f"taxonomy_tree_{run_id}.json", "w", encoding="utf-8"
+        ) as f:
+            json.dump(taxonomy_tree, f, indent=2, ensure_ascii=False)
 
-    # Save taxonomy tree Pickle (local use only)
-    with open(output_dir / f"taxonomy_tree_{run_id}.pkl", "wb") as f:
-        pickle.dump(taxonomy_tree, f)
+        # Save taxonomy tree Pickle (local use only)
+        with open(output_dir / f"taxonomy_tree_{run_id}.pkl", "wb") as f:
+            pickle.dump(taxonomy_tree, f)
 
-    json_end = time.perf_counter()
-    logger.info(f"Taxonomy tree saved in {json_end - json_start:.2f} seconds.")
+        json_end = time.perf_counter()
+        logger.info(f"Taxonomy tree saved in {json_end - json_start:.2f} seconds.")
+
+    # Save the group fingerprints the next run's changed groups are reported against
+    if group_fingerprints is not None:
+        partition.save_group_fingerprints(
+            group_fingerprints, output_dir, config.get("etl_version", "unknown")
+        )
 
     print("\n📦 Outputs saved (CSV/JSON for sharing, Pickle for local use).")
+    return {"outputs_saved": True}
+
+
+# Stage table: name, function, inputs, outputs and the config entries it reads.
+# The run log and outputs are side effects and always run when reached.
+PIPELINE_STAGES = [
+    stages.Stage(
+        "extract",
+        stage_extract,
+        ("workbook",),
+        ("df_cleaned", "extract_info"),
+        (
+            "optional_cols",
+            "extraction",
+            "dtypes",
+            "header_pattern",
+            "header_prefix",
+            "engine",
+        ),
+    ),
+    stages.Stage(
+        "hierarchy",
+        stage_hierarchy,
+        ("df_cleaned",),
+        ("df_hierarchy", "parent_index", "full_paths", "group_qa", "group_fingerprints"),
+        (
+            "max_hierarchy_levels",
+            "level_columns",
+            "transform",
+            "df_hierarchy_cols_order",
+            "dtypes",
+        ),
+    ),
+    stages.Stage(
+        "paths",
+        stage_paths,
+        ("df_hierarchy", "parent_index", "full_paths"),
+        ("df_materialized_path", "taxonomy_tree", "df_closure", "df_concept_index"),
+        ("outputs",),
+    ),
+    stages.Stage(
+        "qa",
+        stage_qa,
+        ("df_hierarchy", "df_materialized_path", "group_qa"),
+        ("qa_results", "failed_critical", "anomalies"),
+        ("critical_checks", "engine"),
+    ),
+    stages.Stage(
+        "runlog",
+        stage_runlog,
+        (
+            "extract_info",
+            "df_hierarchy",
+            "df_materialized_path",
+            "df_closure",
+            "qa_results",
+            "anomalies",
+            "group_fingerprints",
+        ),
+        ("run_log",),
+        checkpoint=False,
+    ),
+    stages.Stage(
+        "outputs",
+        stage_outputs,
+        (
+            "df_hierarchy",
+            "df_materialized_path",
+            "taxonomy_tree",
+            "df_closure",
+            "df_concept_index",
+            "group_fingerprints",
+            "failed_critical",
+        ),
+        ("outputs_saved",),
+        checkpoint=False,
+    ),
+]
+STAGE_NAMES = [stage.name for stage in PIPELINE_STAGES]
+
+
+# === Main ETL Pipeline ===
+def run_pipeline(
+    config: dict,
+    paths: dict,
+    source_file_config: dict,
+    logger: logging.Logger,
+    force: bool = False,
+    no_cache: bool = False,
+    output_dir: Path | None = None,
+    logs_dir: Path | None = None,
+    resume: bool = False,
+    from_stage: str | None = None,
+) -> tuple[dict, bool]:
+    """
+    Runs the ETL pipeline for one source workbook.
+
+    Args:
+        config: Pipeline configuration.
+        paths: Data paths from `get_paths`.
+        source_file_config: The `source_file` entry (filename, sheet_name[s]) to process.
+        logger: Logger for the run.
+        force: Save outputs even if critical QA checks fail.
+        no_cache: Re-extract the workbook even if a cached extract exists.
+        output_dir: Where outputs are saved; defaults to `paths["output_dir"]`.
+        logs_dir: Where run logs are saved; defaults to `paths["logs_dir"]`.
+        resume: Skip stages whose checkpoint matches their inputs.
+        from_stage: Rerun this stage and every later one, resuming the earlier ones.
+
+    Returns:
+        The run log and whether the outputs were saved (False when fail-fast aborted).
+    """
+    output_dir = output_dir or paths["output_dir"]
+    logs_dir = logs_dir or paths["logs_dir"]
+
+    logger.info("ETL process started.")
+
+    # Record start time
+    start_time = time.perf_counter()
+    memory = profiling.StageMemory(
+        logger, enabled=config.get("profiling", {}).get("memory", False)
+    )
+
+    # File and sheet details
+    filename = source_file_config.get("filename")
+    sheet_name = source_file_config.get("sheet_name")
+    # Optional list of sheets extracted in parallel into one frame
+    sheet_names = source_file_config.get("sheet_names") or [sheet_name]
+
+    if not filename:
+        logger.error("Filename not found in configuration under 'source_file'.")
+        raise ValueError("Missing 'filename' in configuration.")
+
+    file_path = paths["input_dir"] / filename
+    if not file_path.exists():
+        logger.error(f"Source workbook not found at {file_path}")
+        raise FileNotFoundError(f"Source workbook not found at {file_path}")
+    # Fail before extracting if the configured engine is not available
+    get_engine(config)
 
-    end_time = time.perf_counter()
-    logger.info(f"ETL process completed in {end_time - start_time:.2f} seconds.")
+    # === RUN METADATA ===
+    context = {
+        "config": config,
+        "paths": paths,
+        "logger": logger,
+        "memory": memory,
+        "force": force,
+        "no_cache": no_cache,
+        "output_dir": output_dir,
+        "logs_dir": logs_dir,
+        "file_path": file_path,
+        # Hashed once, for the workbook fingerprint and the extract cache key
+        "workbook_sha256": cache.file_sha256(file_path),
+        "sheet_names": sheet_names,
+        "multi_sheet": len(sheet_names) > 1,
+        "run_id": datetime.now().strftime("%Y%m%d-%H%M"),
+        "run_datetime": datetime.now().strftime("%Y-%m-%d %H:%M"),
+        "operator": config.get("operator", "Automated ETL Pipeline"),
+        "environment": socket.gethostname(),
+    }
+
+    # The workbook enters the DAG fingerprinted by its content and the sheets read
+    workbook_fingerprint = hashlib.sha256(
+        json.dumps(
+            [context["workbook_sha256"], filename, sheet_names], default=str
+        ).encode("utf-8")
+    ).hexdigest()
+
+    # Stages derive new frames from their inputs; with copy-on-write the columns they
+    # leave unchanged are shared instead of copied. Set for this run only, so
+    # importers of this module keep their own pandas behaviour.
+    try:
+        with pd.option_context("mode.copy_on_write", True):
+            artifacts = stages.run_stages(
+                PIPELINE_STAGES,
+                context,
+                {"workbook": (file_path, workbook_fingerprint)},
+                logger,
+                checkpoint_dir=paths["intermediate_dir"] / "checkpoints" / Path(filename).stem,
+                # Resumed runs always checkpoint the stages they rerun
+                save_checkpoints=(
+                    config.get("checkpoints", False) or resume or from_stage is not None
+                ),
+                resume=resume,
+                from_stage=from_stage,
+                memory=memory,
+            )
+    finally:
+        memory.stop()
+
+    outputs_saved = artifacts["outputs_saved"]
+    if outputs_saved:
+        end_time = time.perf_counter()
+        logger.info(f"ETL process completed in {end_time - start_time:.2f} seconds.")
     # --- End Outputs ---
+    return artifacts["run_log"], outputs_saved
+
+
+def main():
+    """Main function to run the ETL pipeline."""
+    # === ARGUMENT PARSER ===
+    parser = argparse.ArgumentParser(description="IFRS Taxonomy ETL")
+    parser.add_argument(
+        "--force", action="store_true", help="Override fail-fast QA checks"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Re-extract the workbook even if a cached extract exists",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip stages whose checkpointed inputs are unchanged",
+    )
+    parser.add_argument(
+        "--from-stage",
+        choices=STAGE_NAMES,
+        default=None,
+        help="Rerun from this stage on, resuming the earlier stages from checkpoints",
+    )
+    args = parser.parse_args()
+
+    # Get project root
+    project_root = get_project_root()
+
+    # Setup a temporary logger for initial setup
+    temp_logger = etl_config.setup_logger(
+        "etl_setup", project_root / "logs/etl_setup.log"
+    )
+    # Load configuration
+    config = load_config(project_root, temp_logger)
+    # Get paths
+    paths = get_paths(config, project_root)
+
+    # Setup the main application logger using config paths
+    log_path = paths["logs_dir"] / "ifrs_taxonomy_etl.log"
+    logger = etl_config.setup_logger("ifrs_taxonomy_etl", log_path)
+
+    _, outputs_saved = run_pipeline(
+        config,
+        paths,
+        config.get("source_file", {}),
+        logger,
+        force=args.force,
+        no_cache=args.no_cache,
+        resume=args.resume,
+        from_stage=args.from_stage,
+    )
+    if not outputs_saved:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,242 @@
+"""
+Per-group partitioned transform of the IFRS taxonomy ETL.
+
+Every `[NNNNNN]` group is an independent presentation block. In partitioned mode
+each contiguous run of rows with the same `group_code` (within a sheet) is linked
+on its own: group starts are barriers of `transform.parent_positions`, so every
+group is linked, its paths materialised and its QA checks run in one vectorised
+pass over the frame. With several workers, each process gets a contiguous range
+of whole groups. The id and nested-set columns are assigned globally.
+
+Groups are also fingerprinted over the columns their results depend on, so a run
+can report which groups changed since the last saved run (`transform.changed_groups`).
+"""
+
+import hashlib
+import json
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import src.etl.transform as transform
+import src.etl.tree as tree
+
+# Columns a worker needs to link a group and materialise its paths
+PARTITION_COLUMNS = ["indent", "group_code", "group_name", "label_clean", "Type"]
+
+# Group fingerprints of the last saved run, kept next to its outputs
+GROUP_FINGERPRINTS_FILE = "group_fingerprints.json"
+
+
+def group_starts(df: pd.DataFrame) -> np.ndarray:
+    """
+    Returns a boolean mask of the rows that start a group: the first row of each
+    contiguous run of equal group codes, and of each sheet of a multi-sheet extract.
+    """
+    keys = [df["group_code"]]
+    if "sheet_name" in df.columns:
+        keys.append(df["sheet_name"])
+    return transform.block_starts(*keys)
+
+
+def group_qa_results(
+    df: pd.DataFrame, paths: np.ndarray, starts: np.ndarray
+) -> list[dict[str, bool]]:
+    """
+    Runs the QA checks that apply within a single group, for every group of `df`
+    at once.
+
+    Args:
+        df: Rows of one or more whole groups, in taxonomy order.
+        paths: Full paths of the rows.
+        starts: Group start mask of the rows (see `group_starts`).
+
+    Returns:
+        The QA results of each group, in row order.
+    """
+    group_ids = np.cumsum(starts) - 1
+    n_groups = int(starts.sum())
+    path_codes = pd.factorize(paths)[0]
+    # A path repeated within a group; paths of different groups may coincide
+    duplicated = pd.Series(group_ids * (len(paths) + 1) + path_codes).duplicated().to_numpy()
+    empty_label = df["Type"].ne("abstract").to_numpy(dtype=bool, na_value=True) & (
+        df["label_clean"].isna().to_numpy()
+    )
+    unique_full_path = np.bincount(group_ids[duplicated], minlength=n_groups) == 0
+    no_empty_labels = np.bincount(group_ids[empty_label], minlength=n_groups) == 0
+    return [
+        {"unique_full_path": bool(unique), "no_empty_labels_unless_abstract": bool(labels)}
+        for unique, labels in zip(unique_full_path, no_empty_labels)
+    ]
+
+
+def transform_groups(
+    df: pd.DataFrame, starts: np.ndarray
+) -> tuple[np.ndarray, np.ndarray, list[dict[str, bool]]]:
+    """
+    Links a run of whole groups, each on its own, and materialises their paths in
+    one vectorised pass: group starts are barriers for `transform.parent_positions`.
+    Executed in a worker process when the transform runs in a pool.
+
+    Args:
+        df: Rows of one or more whole groups (`PARTITION_COLUMNS`), in taxonomy order.
+        starts: Group start mask of the rows (see `group_starts`).
+
+    Returns:
+        The parent positions (relative to `df`), the full paths and the QA results
+        of each group.
+    """
+    parents = transform.parent_positions(df["indent"].to_numpy(dtype=np.int64), starts)
+    paths = tree.full_paths(df, parents)
+    return parents, paths, group_qa_results(df, paths, starts)
+
+
+def _transform_rows(
+    df: pd.DataFrame, starts: np.ndarray, n_workers: int
+) -> tuple[np.ndarray, np.ndarray, list[dict[str, bool]]]:
+    """
+    Runs `transform_groups` on the rows of `df`, in-process or split into one
+    contiguous range of whole groups per worker process.
+    """
+    if n_workers <= 1:
+        return transform_groups(df, starts)
+
+    # Cut at the group starts closest to equal row counts
+    group_rows = np.flatnonzero(starts)
+    targets = np.arange(1, n_workers) * len(df) // n_workers
+    nearest = np.minimum(np.searchsorted(group_rows, targets), len(group_rows) - 1)
+    cuts = np.unique(group_rows[nearest])
+    bounds = list(zip([0, *cuts.tolist()], [*cuts.tolist(), len(df)]))
+    bounds = [(start, end) for start, end in bounds if start < end]
+    with ProcessPoolExecutor(max_workers=len(bounds)) as pool:
+        results = list(
+            pool.map(
+                transform_groups,
+                [df.iloc[start:end] for start, end in bounds],
+                [starts[start:end] for start, end in bounds],
+            )
+        )
+    parents = np.concatenate(
+        [
+            np.where(chunk_parents >= 0, chunk_parents + start, -1)
+            for (start, _), (chunk_parents, _, _) in zip(bounds, results)
+        ]
+    )
+    paths = np.concatenate([chunk_paths for _, chunk_paths, _ in results])
+    qa = [group_qa for _, _, chunk_qa in results for group_qa in chunk_qa]
+    return parents, paths, qa
+
+
+def build_hierarchy_by_group(
+    df: pd.DataFrame,
+    logger: logging.Logger,
+    level_columns: int = 0,
+    max_workers: int | None = None,
+) -> tuple[pd.DataFrame, np.ndarray, np.ndarray, list[dict]]:
+    """
+    Builds the hierarchy and full paths group by group.
+
+    Args:
+        df: Cleaned extract in taxonomy order.
+        logger: Logger for the run.
+        level_columns: Number of `Level_N` columns to add (0 adds none).
+        max_workers: Number of worker processes, each given a contiguous range of
+            groups; None or 1 transforms every group in-process.
+
+    Returns:
+        The hierarchy frame (as `transform.build_hierarchy`), the global parent
+        positions, the full paths and the group code and QA results of each group,
+        in row order.
+    """
+    starts = group_starts(df)
+    n_groups = int(starts.sum())
+    n_workers = min(max_workers or 1, max(n_groups, 1))
+    logger.info(f"Transforming {n_groups} groups with {n_workers} worker processes.")
+    parents, paths, qa = _transform_rows(df[PARTITION_COLUMNS], starts, n_workers)
+
+    group_codes = df["group_code"].to_numpy(dtype=object)[starts]
+    group_qa = [
+        {"group_code": str(code), "qa": group} for code, group in zip(group_codes, qa)
+    ]
+    df_hierarchy = transform.link_hierarchy(df, parents, level_columns)
+    return df_hierarchy, parents, paths, group_qa
+
+
+def group_fingerprints(df: pd.DataFrame) -> dict[str, str]:
+    """
+    Returns a content fingerprint for each group: the SHA-256 of the row hashes of
+    its `PARTITION_COLUMNS`, so any change to a row, or an added/removed row, of the
+    group changes its fingerprint.
+
+    Groups are keyed by group code, prefixed with `<sheet>/` in a multi-sheet extract;
+    a code repeated in another block gets a `#2`, `#3`, ... suffix.
+    """
+    starts = group_starts(df)
+    group_rows = np.flatnonzero(starts)
+    ends = np.append(group_rows[1:], len(df))
+    row_hashes = pd.util.hash_pandas_object(df[PARTITION_COLUMNS], index=False).to_numpy()
+    keys = df["group_code"].astype(object).to_numpy()[group_rows].astype(str)
+    if "sheet_name" in df.columns:
+        sheets = df["sheet_name"].astype(object).to_numpy()[group_rows].astype(str)
+        keys = np.char.add(np.char.add(sheets, "/"), keys)
+
+    fingerprints = {}
+    for key, start, end in zip(keys.tolist(), group_rows.tolist(), ends.tolist()):
+        unique_key, n = key, 1
+        while unique_key in fingerprints:
+            n += 1
+            unique_key = f"{key}#{n}"
+        fingerprints[unique_key] = hashlib.sha256(row_hashes[start:end].tobytes()).hexdigest()
+    return fingerprints
+
+
+def changed_groups(previous: dict[str, str], current: dict[str, str]) -> dict[str, list[str]]:
+    """
+    Compares the group fingerprints of two runs (see `group_fingerprints`).
+
+    Returns:
+        The keys of the groups whose content changed, of the groups that are new in
+        `current` and of the groups no longer in it.
+    """
+    return {
+        "changed": [
+            key
+            for key, fingerprint in current.items()
+            if key in previous and previous[key] != fingerprint
+        ],
+        "added": [key for key in current if key not in previous],
+        "removed": [key for key in previous if key not in current],
+    }
+
+
+def load_group_fingerprints(
+    state_dir: Path, etl_version: str, logger: logging.Logger
+) -> dict[str, str] | None:
+    """
+    Loads the group fingerprints saved by `save_group_fingerprints`.
+
+    Returns None when there are none, or when they were written by another ETL
+    version.
+    """
+    path = state_dir / GROUP_FINGERPRINTS_FILE
+    if not path.exists():
+        return None
+    with open(path, encoding="utf-8") as f:
+        saved = json.load(f)
+    if saved.get("etl_version") != etl_version:
+        logger.info("Group fingerprints were saved by another ETL version; ignoring them.")
+        return None
+    return saved["groups"]
+
+
+def save_group_fingerprints(
+    fingerprints: dict[str, str], state_dir: Path, etl_version: str
+) -> Path:
+    """Saves the group fingerprints of a run as JSON and returns the file path."""
+    path = state_dir / GROUP_FINGERPRINTS_FILE
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"etl_version": etl_version, "groups": fingerprints}, f, indent=2)
+    return path
@@ -0,0 +1,229 @@
+"""
+Polars implementation of the columnar transform and QA stages (`engine: polars`).
+
+The group-header and label-cleaning steps of a batch run as one lazy Polars plan
+(`group_and_clean`) over only the columns they read: the header regex is only
+evaluated on rows starting with the header prefix, and the forward fill, label
+cleaning, abstract marking and Type filter are fused, so the batch crosses from
+pandas to Polars and back once. `assign_group_headers` and `clean_labels` run the
+two halves of that plan on their own. Results are handed back as pandas objects
+with the same index, columns and dtypes as the pandas path in `transform.py`
+(`string[pyarrow]` columns are wrapped around the Arrow data, not rebuilt from
+Python objects), so every later stage is engine-agnostic. The QA checks run as one
+plan over the hierarchy columns plus a hash count of the paths.
+
+Polars is an optional dependency: it is only imported when this engine is used.
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+import src.etl.transform as transform
+
+try:
+    import polars as pl
+except ImportError:  # optional dependency, see require_polars()
+    pl = None
+
+# Row position column added to the lazy plans to map results back onto the frame
+ROW_COLUMN = "__row"
+
+
+def require_polars() -> None:
+    """Raises an ImportError explaining how to enable the Polars engine."""
+    if pl is None:
+        raise ImportError("engine: polars requires the polars package (pip install polars)")
+
+
+def _lazy_frame(columns: dict[str, pd.Series]) -> "pl.LazyFrame":
+    """Builds a lazy frame over the given columns, plus their row positions."""
+    return pl.from_pandas(pd.DataFrame(columns)).lazy().with_row_index(ROW_COLUMN)
+
+
+def _as_pandas(values: "pl.Series", like: pd.Series, index: pd.Index) -> pd.Series:
+    """
+    Converts a Polars result column to pandas with the dtype of `like`. Arrow
+    string columns are wrapped around the Arrow data of the result.
+    """
+    if like.dtype == transform.STRING_DTYPE:
+        arrow = values.cast(pl.String).to_arrow(compat_level=pl.CompatLevel.oldest())
+        return pd.Series(pd.arrays.ArrowStringArray(arrow), index=index)
+    return pd.Series(values.to_numpy(), index=index, dtype=like.dtype)
+
+
+def _text_column(values: pd.Series) -> pd.Series:
+    """Returns a text column as is if it holds Arrow strings, else as `str()` values."""
+    return values if values.dtype == transform.STRING_DTYPE else values.astype(str)
+
+
+def _group_columns(
+    df: pd.DataFrame, header_pattern: re.Pattern, carry: tuple | None, header_prefix: str
+) -> tuple[dict[str, pd.Series], list["pl.Expr"]]:
+    """
+    Returns the input columns and the `group_code` / `group_name` expressions of
+    the group-header plan (see `assign_group_headers`).
+    """
+    names = pl.col("Concept name")
+    # The regex only runs on rows starting with the prefix; other rows are null
+    if header_prefix:
+        names = pl.when(names.str.starts_with(header_prefix)).then(names)
+    headers = names.str.extract_groups(header_pattern.pattern)
+
+    columns = {"Concept name": df["Concept name"]}
+    # Sheet blocks, numbered from 0; headers do not carry over between them
+    sheet = None
+    if "sheet_name" in df.columns:
+        columns["sheet_name"] = df["sheet_name"]
+        changed = pl.col("sheet_name").ne_missing(pl.col("sheet_name").shift())
+        sheet = (changed & (pl.int_range(pl.len()) > 0)).cum_sum()
+
+    groups = []
+    for i, (col, carried) in enumerate(zip(transform.GROUP_COLUMNS, carry or (None, None))):
+        filled = headers.struct[i].forward_fill()
+        if sheet is not None:
+            filled = filled.over(sheet)
+        if pd.notna(carried):
+            carried_fill = filled.fill_null(pl.lit(carried))
+            filled = carried_fill if sheet is None else (
+                pl.when(sheet == 0).then(carried_fill).otherwise(filled)
+            )
+        groups.append(filled.alias(col))
+    return columns, groups
+
+
+def _clean_exprs() -> list["pl.Expr"]:
+    """Returns the `label_clean` and `Type` expressions of the cleaning plan."""
+    label_clean = pl.col("Preferred label").str.strip_chars().fill_null(str(None))
+    is_abstract = pl.col("Type").is_null() & label_clean.str.contains("[abstract]", literal=True)
+    return [
+        label_clean.alias("label_clean"),
+        pl.when(is_abstract).then(pl.lit("abstract")).otherwise(pl.col("Type")).alias("Type"),
+    ]
+
+
+def assign_group_headers(
+    df: pd.DataFrame,
+    header_pattern: re.Pattern,
+    carry: tuple | None = None,
+    header_prefix: str = "",
+) -> tuple[pd.DataFrame, tuple]:
+    """
+    Adds `group_code` and `group_name` from the group header rows, forward-filled
+    within each sheet; `carry` fills the leading rows of the first sheet (see
+    `transform.assign_group_headers`).
+
+    Returns:
+        The grouped frame and the carry to pass with the next batch.
+    """
+    require_polars()
+    columns, groups = _group_columns(df, header_pattern, carry, header_prefix)
+    result = _lazy_frame(columns).select(groups).collect()
+
+    if len(df):
+        carry = tuple(result[col][-1] for col in transform.GROUP_COLUMNS)
+    like = df["Concept name"]
+    df_grouped = df.assign(
+        **{col: _as_pandas(result[col], like, df.index) for col in transform.GROUP_COLUMNS}
+    )
+    return df_grouped, carry
+
+
+def clean_labels(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Adds `label_clean`, marks untyped "[abstract]" rows as abstract and drops rows
+    that still have no Type (see `transform.clean_labels`).
+    """
+    require_polars()
+    labels = _text_column(df["Preferred label"])
+    kept = (
+        _lazy_frame({"Preferred label": labels, "Type": df["Type"]})
+        .select(ROW_COLUMN, *_clean_exprs())
+        .filter(pl.col("Type").is_not_null())
+        .collect()
+    )
+
+    df_kept = df.iloc[kept[ROW_COLUMN].to_numpy().astype(np.int64)]
+    return df_kept.assign(
+        label_clean=_as_pandas(kept["label_clean"], labels, df_kept.index),
+        Type=_as_pandas(kept["Type"], df["Type"], df_kept.index),
+    )
+
+
+def group_and_clean(
+    df: pd.DataFrame,
+    header_pattern: re.Pattern,
+    carry: tuple | None = None,
+    header_prefix: str = "",
+) -> tuple[pd.DataFrame, tuple]:
+    """
+    Runs `assign_group_headers` and then `clean_labels` as one lazy plan.
+
+    The carry is read from the last grouped row, before the Type filter drops the
+    header rows; both results are collected together and share the grouped subplan.
+
+    Returns:
+        The cleaned frame and the carry to pass with the next batch.
+    """
+    require_polars()
+    labels = _text_column(df["Preferred label"])
+    columns, groups = _group_columns(df, header_pattern, carry, header_prefix)
+    grouped = _lazy_frame(
+        {**columns, "Preferred label": labels, "Type": df["Type"]}
+    ).with_columns(groups)
+    kept, last = pl.collect_all(
+        [
+            grouped.select(ROW_COLUMN, *transform.GROUP_COLUMNS, *_clean_exprs()).filter(
+                pl.col("Type").is_not_null()
+            ),
+            grouped.select(pl.col(transform.GROUP_COLUMNS).last()),
+        ]
+    )
+
+    if len(df):
+        carry = tuple(last[col][0] for col in transform.GROUP_COLUMNS)
+    df_kept = df.iloc[kept[ROW_COLUMN].to_numpy().astype(np.int64)]
+    like = df["Concept name"]
+    df_cleaned = df_kept.assign(
+        **{col: _as_pandas(kept[col], like, df_kept.index) for col in transform.GROUP_COLUMNS},
+        label_clean=_as_pandas(kept["label_clean"], labels, df_kept.index),
+        Type=_as_pandas(kept["Type"], df["Type"], df_kept.index),
+    )
+    return df_cleaned, carry
+
+
+def qa_results(df_hierarchy: pd.DataFrame, df_materialized_path: pd.DataFrame) -> dict:
+    """
+    Runs the automated QA checks of SECTION 5: the column checks as one Polars plan,
+    the path uniqueness as a hash count over the path key columns
+    (`transform.path_key_columns`).
+    """
+    require_polars()
+    hierarchy_checks = (
+        pl.from_pandas(df_hierarchy[["group_code", "group_name", "Type", "label_clean"]])
+        .lazy()
+        .select(
+            (
+                pl.col("group_code").is_not_null().all()
+                & pl.col("group_name").is_not_null().all()
+            ).alias("all_have_group_info"),
+            (pl.col("label_clean").is_not_null() | pl.col("Type").eq_missing("abstract"))
+            .all()
+            .alias("no_empty_labels_unless_abstract"),
+        )
+        .collect()
+    )
+    path_keys = transform.path_key_columns(df_materialized_path)
+    if len(path_keys) == 1:
+        paths = pl.from_pandas(df_materialized_path["full_path"])
+    else:
+        paths = pl.from_pandas(df_materialized_path[path_keys])
+    return {
+        "all_have_group_info": hierarchy_checks["all_have_group_info"].item(),
+        "indent_matches_int": pd.api.types.is_integer_dtype(df_hierarchy["indent"]),
+        "no_empty_labels_unless_abstract": hierarchy_checks[
+            "no_empty_labels_unless_abstract"
+        ].item(),
+        "unique_full_path": paths.n_unique() == len(paths),
+    }
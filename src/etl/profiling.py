@@ -0,0 +1,115 @@
+"""
+Per-stage memory profiling for the IFRS taxonomy ETL.
+
+Each stage reports three peaks:
+- `traced`: tracemalloc, which sees Python objects and NumPy / pandas buffers but
+  not Arrow memory;
+- `arrow`: bytes held by the Arrow memory pool (`pyarrow.total_allocated_bytes()`),
+  where the `string[pyarrow]` columns and Parquet reads live;
+- `rss`: the resident set size of the process (psutil), which covers both plus
+  interpreter and allocator overhead.
+
+The Arrow and RSS peaks are sampled by a background thread while a stage runs.
+Tracing slows allocations down, so profiling is only switched on when
+`profiling.memory` is set in the pipeline config.
+"""
+
+import logging
+import threading
+import tracemalloc
+
+import psutil
+import pyarrow as pa
+
+MIB = 1 << 20
+
+# Seconds between two RSS / Arrow samples while a stage runs
+SAMPLE_INTERVAL = 0.01
+SAMPLER_THREAD_NAME = "stage-memory-sampler"
+
+
+class StageMemory:
+    """
+    Records the peak traced, Arrow and resident memory of each pipeline stage.
+
+    Usage:
+        memory = StageMemory(logger, enabled=True)
+        memory.start_stage("hierarchy")
+        try:
+            ...
+        finally:
+            peaks_mib = memory.end_stage("hierarchy")  # {"traced", "arrow", "rss"}
+        memory.stop()
+    """
+
+    def __init__(self, logger: logging.Logger, enabled: bool = False):
+        self.logger = logger
+        self.enabled = enabled
+        self.peaks_mib = {}
+        self._process = psutil.Process()
+        self._sampler = None
+        self._stop_sampling = threading.Event()
+        self._arrow_peak = 0
+        self._rss_peak = 0
+        if enabled and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def _sample(self) -> None:
+        """Updates the Arrow and RSS peaks of the running stage."""
+        self._arrow_peak = max(self._arrow_peak, pa.total_allocated_bytes())
+        self._rss_peak = max(self._rss_peak, self._process.memory_info().rss)
+
+    def _sample_until_stopped(self) -> None:
+        """Sampler thread: samples until the stage ends."""
+        while not self._stop_sampling.wait(SAMPLE_INTERVAL):
+            self._sample()
+
+    def start_stage(self, name: str) -> None:
+        """Starts measuring a stage from the memory currently allocated."""
+        if not self.enabled:
+            return
+        tracemalloc.reset_peak()
+        self._arrow_peak = 0
+        self._rss_peak = 0
+        self._sample()
+        self._stop_sampling.clear()
+        self._sampler = threading.Thread(
+            target=self._sample_until_stopped, name=SAMPLER_THREAD_NAME, daemon=True
+        )
+        self._sampler.start()
+
+    def _stop_sampler(self) -> None:
+        """Stops and joins the sampler thread, if one is running."""
+        self._stop_sampling.set()
+        if self._sampler is not None:
+            self._sampler.join()
+            self._sampler = None
+
+    def end_stage(self, name: str) -> dict[str, float] | None:
+        """
+        Records, logs and returns the peak MiB traced, held by Arrow and resident
+        while the stage ran, including data still held from earlier stages (None if
+        disabled).
+        """
+        if not self.enabled:
+            return None
+        self._stop_sampler()
+        self._sample()
+        _, traced_peak = tracemalloc.get_traced_memory()
+        self.peaks_mib[name] = {
+            "traced": round(traced_peak / MIB, 1),
+            "arrow": round(self._arrow_peak / MIB, 1),
+            "rss": round(self._rss_peak / MIB, 1),
+        }
+        peaks = self.peaks_mib[name]
+        self.logger.info(
+            f"Peak memory during {name}: {peaks['traced']} MiB traced, "
+            f"{peaks['arrow']} MiB Arrow, {peaks['rss']} MiB RSS"
+        )
+        return peaks
+
+    def stop(self) -> None:
+        """Stops sampling and tracing."""
+        self._stop_sampler()
+        if self.enabled and tracemalloc.is_tracing():
+            tracemalloc.stop()
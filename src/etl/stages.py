@@ -0,0 +1,186 @@
+"""
+Stage DAG runner with checkpoints for the IFRS taxonomy ETL.
+
+A pipeline is a list of named stages, each declaring the artifacts it consumes and
+produces and the config entries it reads. A stage's fingerprint hashes its name,
+those config entries and the fingerprints of its inputs, so it changes whenever
+anything upstream of the stage changes. Stage outputs are checkpointed (a Pickle
+per artifact plus a JSON fingerprint sidecar) and, when resuming, stages whose
+checkpoint matches their fingerprint are skipped; of their outputs, only those a
+stage that does run needs are loaded.
+"""
+
+import hashlib
+import json
+import logging
+import pickle
+from collections.abc import Callable
+from pathlib import Path
+from typing import NamedTuple
+
+import src.etl.profiling as profiling
+
+
+class Stage(NamedTuple):
+    """
+    A pipeline stage.
+
+    `func(context, **inputs)` returns a dict holding every name in `outputs`.
+    Stages with `checkpoint=False` (side-effect sinks such as writing outputs)
+    always run when reached.
+    """
+
+    name: str
+    func: Callable[..., dict]
+    inputs: tuple[str, ...]
+    outputs: tuple[str, ...]
+    config_keys: tuple[str, ...] = ()
+    checkpoint: bool = True
+
+
+def stage_fingerprint(stage: Stage, config: dict, input_fingerprints: dict[str, str]) -> str:
+    """Hashes a stage's name, the config entries it reads and its inputs' fingerprints."""
+    payload = {
+        "stage": stage.name,
+        "etl_version": config.get("etl_version", "unknown"),
+        "config": {key: config.get(key) for key in stage.config_keys},
+        "inputs": {name: input_fingerprints[name] for name in stage.inputs},
+    }
+    return hashlib.sha256(
+        json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+
+
+def _checkpoint_paths(checkpoint_dir: Path, stage_name: str) -> tuple[Path, Path]:
+    """Returns the (outputs directory, fingerprint sidecar) paths of a stage checkpoint."""
+    return checkpoint_dir / stage_name, checkpoint_dir / f"{stage_name}.json"
+
+
+def checkpoint_fingerprint(checkpoint_dir: Path, stage: Stage) -> str | None:
+    """
+    Returns the fingerprint a stage was checkpointed with, or None if there is none
+    or it lacks one of the stage's current outputs.
+    """
+    outputs_dir, meta_path = _checkpoint_paths(checkpoint_dir, stage.name)
+    if not meta_path.exists() or not all(
+        (outputs_dir / f"{name}.pkl").exists() for name in stage.outputs
+    ):
+        return None
+    with open(meta_path, encoding="utf-8") as f:
+        return json.load(f).get("fingerprint")
+
+
+def save_checkpoint(
+    checkpoint_dir: Path, stage: Stage, fingerprint: str, outputs: dict
+) -> None:
+    """
+    Writes a stage's outputs (one Pickle per artifact) and then its fingerprint, so a
+    partly written checkpoint never matches.
+    """
+    outputs_dir, meta_path = _checkpoint_paths(checkpoint_dir, stage.name)
+    meta_path.unlink(missing_ok=True)
+    outputs_dir.mkdir(parents=True, exist_ok=True)
+    for name in stage.outputs:
+        tmp_path = outputs_dir / f"{name}.pkl.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(outputs[name], f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp_path.replace(outputs_dir / f"{name}.pkl")
+    tmp_path = meta_path.with_suffix(".json.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"stage": stage.name, "fingerprint": fingerprint}, f, indent=2)
+    tmp_path.replace(meta_path)
+
+
+def load_checkpoint(checkpoint_dir: Path, stage_name: str, names: list[str]) -> dict:
+    """Loads the named artifacts from a stage checkpoint."""
+    outputs_dir, _ = _checkpoint_paths(checkpoint_dir, stage_name)
+    artifacts = {}
+    for name in names:
+        with open(outputs_dir / f"{name}.pkl", "rb") as f:
+            artifacts[name] = pickle.load(f)
+    return artifacts
+
+
+def run_stages(
+    stages: list[Stage],
+    context: dict,
+    sources: dict[str, tuple[object, str]],
+    logger: logging.Logger,
+    checkpoint_dir: Path,
+    save_checkpoints: bool = True,
+    resume: bool = False,
+    from_stage: str | None = None,
+    memory: profiling.StageMemory | None = None,
+) -> dict:
+    """
+    Runs the stages in order, reusing unchanged checkpointed stages when resuming.
+
+    Args:
+        stages: Stages in dependency order.
+        context: Run-wide settings passed to every stage (config, paths, logger...).
+        sources: External inputs as {name: (value, fingerprint)}, e.g. the workbook.
+        logger: Logger for the run.
+        checkpoint_dir: Directory of the stage checkpoints.
+        save_checkpoints: Write the outputs of every checkpointed stage that runs.
+        resume: Skip stages whose checkpoint matches their fingerprint.
+        from_stage: Rerun this stage and every later one; earlier stages are
+            resumed (implies `resume`).
+        memory: Per-stage memory profiler.
+
+    Returns:
+        The artifacts still held after the last stage (those no stage consumes).
+    """
+    config = context["config"]
+    stage_names = [stage.name for stage in stages]
+    if from_stage is not None and from_stage not in stage_names:
+        raise ValueError(f"Unknown stage '{from_stage}'; stages are {stage_names}")
+    rerun_from = stage_names.index(from_stage) if from_stage else len(stages)
+    resume = resume or from_stage is not None
+
+    # Fingerprints only depend on the config and upstream fingerprints, so every
+    # stage's fingerprint is known before anything runs
+    fingerprints = {name: fingerprint for name, (_, fingerprint) in sources.items()}
+    stage_fingerprints = {}
+    for stage in stages:
+        stage_fingerprints[stage.name] = stage_fingerprint(stage, config, fingerprints)
+        fingerprints.update({name: stage_fingerprints[stage.name] for name in stage.outputs})
+
+    reused = set()
+    if resume:
+        for stage in stages[:rerun_from]:
+            if stage.checkpoint and checkpoint_fingerprint(
+                checkpoint_dir, stage
+            ) == stage_fingerprints[stage.name]:
+                reused.add(stage.name)
+
+    # Inputs of the stages that run, and the last stage consuming each artifact
+    needed = {name for stage in stages if stage.name not in reused for name in stage.inputs}
+    last_use = {name: i for i, stage in enumerate(stages) for name in stage.inputs}
+
+    artifacts = {name: value for name, (value, _) in sources.items()}
+    for i, stage in enumerate(stages):
+        if stage.name in reused:
+            to_load = [name for name in stage.outputs if name in needed]
+            if to_load:
+                artifacts.update(load_checkpoint(checkpoint_dir, stage.name, to_load))
+                logger.info(f"Stage '{stage.name}' unchanged: loaded from checkpoint.")
+            else:
+                logger.info(f"Stage '{stage.name}' unchanged: skipped.")
+        else:
+            if memory is not None:
+                memory.start_stage(stage.name)
+            try:
+                outputs = stage.func(context, **{name: artifacts[name] for name in stage.inputs})
+            finally:
+                # Also stops the memory sampler of a stage that raised
+                if memory is not None:
+                    memory.end_stage(stage.name)
+            artifacts.update(outputs)
+            if stage.checkpoint and save_checkpoints:
+                save_checkpoint(checkpoint_dir, stage, stage_fingerprints[stage.name], outputs)
+            del outputs
+
+        # Release artifacts no later stage consumes
+        for name in [name for name in artifacts if last_use.get(name, len(stages)) <= i]:
+            del artifacts[name]
+    return artifacts
@@ -0,0 +1,324 @@
+"""
+Transform stage of the IFRS taxonomy ETL.
+
+Row-local transforms (group headers, label cleaning, abstract type) are written to
+work on a whole extract or on consecutive batches of it, so they can run in a
+streaming pipeline next to `extract.iter_extract_batches`. The hierarchy is derived
+from the whole cleaned extract with array operations on the `indent` column.
+
+Transforms are pure: they return new frames built with `DataFrame.assign` and never
+modify their input, so under pandas copy-on-write unchanged columns are shared with
+the input instead of copied.
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+GROUP_COLUMNS = ["group_code", "group_name"]
+# Group header rows look like "[110000] General information about financial statements"
+DEFAULT_HEADER_PATTERN = r"^\[(\d{6})\]\s*(.*)"
+DEFAULT_HEADER_PREFIX = "["
+STRING_DTYPE = pd.StringDtype("pyarrow")
+
+
+def apply_dtypes(df: pd.DataFrame, dtypes: dict[str, list[str]]) -> pd.DataFrame:
+    """
+    Applies the dtype policy: `category` columns become categoricals, `string`
+    columns Arrow-backed strings. Absent or already converted columns are skipped.
+
+    Args:
+        df: Frame to convert.
+        dtypes: {"category": [...], "string": [...]} column lists from the config.
+    """
+    conversions = {}
+    for col in dtypes.get("string", []):
+        if col in df.columns and df[col].dtype != STRING_DTYPE:
+            conversions[col] = df[col].astype(STRING_DTYPE)
+    for col in dtypes.get("category", []):
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            conversions[col] = df[col].astype("category")
+    return df.assign(**conversions) if conversions else df
+
+
+def assign_group_headers(
+    df: pd.DataFrame,
+    header_pattern: re.Pattern,
+    carry: tuple | None = None,
+    header_prefix: str = "",
+) -> tuple[pd.DataFrame, tuple]:
+    """
+    Adds `group_code` and `group_name` from the group header rows, forward-filled.
+    Group headers do not carry over from one sheet to the next.
+
+    Args:
+        df: Extracted rows (a whole extract or one batch of it).
+        header_pattern: Regex with two groups (code, name) matching header rows.
+        carry: The (group_code, group_name) in effect at the end of the previous
+            batch, or None for the first batch.
+        header_prefix: Literal start of every header row. Only rows starting with
+            it are matched against `header_pattern`; "" matches every row.
+
+    Returns:
+        The grouped frame and the carry to pass with the next batch.
+    """
+    if "sheet_name" in df.columns:
+        sheet_starts = np.flatnonzero(block_starts(df["sheet_name"]))
+        if len(sheet_starts) > 1:
+            sheets = []
+            for start, end in zip(sheet_starts, np.append(sheet_starts[1:], len(df))):
+                df_sheet, carry = assign_group_headers(
+                    df.iloc[start:end], header_pattern, carry, header_prefix
+                )
+                sheets.append(df_sheet)
+                carry = None if end < len(df) else carry
+            return pd.concat(sheets), carry
+
+    names = df["Concept name"]
+    if header_prefix:
+        names = names[names.str.startswith(header_prefix, na=False).astype(bool)]
+    headers = names.str.extract(header_pattern).reindex(df.index)
+    headers.columns = GROUP_COLUMNS
+    carry = carry or (None, None)
+    groups = {}
+    for col, carried in zip(GROUP_COLUMNS, carry):
+        filled = headers[col].ffill()
+        if pd.notna(carried):
+            filled = filled.fillna(carried)
+        groups[col] = filled
+    if len(df):
+        carry = tuple(groups[col].iloc[-1] for col in GROUP_COLUMNS)
+    return df.assign(**groups), carry
+
+
+def clean_labels(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Adds `label_clean`, marks untyped "[abstract]" rows as abstract and drops rows
+    that still have no Type (group headers, blank rows).
+    """
+    labels = df["Preferred label"]
+    if labels.dtype == STRING_DTYPE:
+        # Stay on Arrow strings; missing labels read "None", as str() gives them
+        label_clean = labels.str.strip().fillna(str(None))
+    else:
+        label_clean = labels.astype(str).str.strip()
+    is_abstract = df["Type"].isna() & label_clean.str.contains("[abstract]", regex=False)
+    types = df["Type"].mask(is_abstract, "abstract")
+    keep = types.notna()
+    return df.assign(label_clean=label_clean, Type=types).loc[keep]
+
+
+def block_starts(*keys: pd.Series) -> np.ndarray:
+    """
+    Returns a boolean mask of the rows that start a block: the first row and every
+    row where any of the key columns (e.g. `sheet_name`) differs from the row above.
+    """
+    n_rows = len(keys[0]) if keys else 0
+    starts = np.zeros(n_rows, dtype=bool)
+    starts[:1] = True
+    for key in keys:
+        codes = pd.factorize(key, use_na_sentinel=False)[0]
+        starts[1:] |= codes[1:] != codes[:-1]
+    return starts
+
+
+def parent_positions(indent: np.ndarray, starts: np.ndarray | None = None) -> np.ndarray:
+    """
+    Returns, for every row, the position of its parent: the nearest previous row
+    with a strictly smaller indent, or -1 for a root.
+
+    Levels are processed in ascending order, keeping for every row the last earlier
+    position holding any level seen so far, so the cost is O(rows x distinct levels).
+
+    Args:
+        indent: Indent of every row.
+        starts: Optional mask of block starts (see `block_starts`). Blocks are
+            independent trees: a parent is never looked up before the start of the
+            row's block, so rows whose nearest smaller indent lies there are roots.
+    """
+    n_rows = len(indent)
+    positions = np.arange(n_rows)
+    parents = np.full(n_rows, -1, dtype=np.int64)
+    # Last earlier position whose indent is below the level being processed
+    last_below = np.full(n_rows, -1, dtype=np.int64)
+    for level in np.unique(indent):
+        at_level = indent == level
+        parents[at_level] = last_below[at_level]
+        last_at_level = np.maximum.accumulate(np.where(at_level, positions, -1))
+        last_below[1:] = np.maximum(last_below[1:], last_at_level[:-1])
+    if starts is not None:
+        block_start = np.maximum.accumulate(np.where(starts, positions, 0))
+        parents[parents < block_start] = -1
+    return parents
+
+
+def rows_by_depth(parents: np.ndarray) -> list[np.ndarray]:
+    """
+    Returns the positions of the rows at each depth: the roots, then their
+    children, and so on. Every parent appears in the entry before its children.
+    """
+    n_rows = len(parents)
+    has_parent = parents >= 0
+    parent_or_self = np.where(has_parent, parents, 0)
+    levels = []
+    current = np.flatnonzero(~has_parent)
+    while len(current):
+        levels.append(current)
+        in_current = np.zeros(n_rows, dtype=bool)
+        in_current[current] = True
+        current = np.flatnonzero(has_parent & in_current[parent_or_self])
+    return levels
+
+
+def subtree_sizes(parents: np.ndarray) -> np.ndarray:
+    """Returns the number of nodes in the subtree of every row, itself included."""
+    sizes = np.ones(len(parents), dtype=np.int64)
+    for rows in reversed(rows_by_depth(parents)[1:]):
+        np.add.at(sizes, parents[rows], sizes[rows])
+    return sizes
+
+
+def nested_set_bounds(parents: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Returns the nested-set `lft`, `rgt` and `depth` of every row.
+
+    Rows are in preorder, so when row i is entered i nodes have been entered and
+    i - depth left: `lft = 2 * i - depth + 1`, and its subtree of `size` nodes
+    closes at `rgt = lft + 2 * size - 1`. The descendants of a node are the rows
+    with `lft` between its `lft` and `rgt`.
+    """
+    depth = np.zeros(len(parents), dtype=np.int64)
+    for level, rows in enumerate(rows_by_depth(parents)):
+        depth[rows] = level
+    lft = 2 * np.arange(len(parents), dtype=np.int64) - depth + 1
+    rgt = lft + 2 * subtree_sizes(parents) - 1
+    return lft, rgt, depth
+
+
+def ancestor_positions(parents: np.ndarray, max_levels: int) -> np.ndarray:
+    """
+    Returns a (rows x max_levels) matrix whose column k holds the position of each
+    row's ancestor at depth k (the root is depth 0), or -1 where there is none.
+
+    Rows are filled one depth at a time by copying the parent's ancestors and
+    adding the parent itself.
+    """
+    ancestors = np.full((len(parents), max_levels), -1, dtype=np.int64)
+    for depth, rows in enumerate(rows_by_depth(parents)[1:]):
+        parent_of = parents[rows]
+        ancestors[rows] = ancestors[parent_of]
+        if depth < max_levels:
+            ancestors[rows, depth] = parent_of
+    return ancestors
+
+
+def _gather(values: np.ndarray, positions: np.ndarray) -> np.ndarray:
+    """Takes `values` at `positions`, with None where the position is -1."""
+    gathered = np.full(len(positions), None, dtype=object)
+    present = positions >= 0
+    gathered[present] = values[positions[present]]
+    return gathered
+
+
+def add_level_columns(
+    df: pd.DataFrame, parents: np.ndarray, max_levels: int
+) -> pd.DataFrame:
+    """
+    Adds `Level_1..Level_<max_levels>`: the `label_clean` of each row's ancestors
+    from the root down, None past the row's depth.
+
+    Args:
+        df: Frame the parent positions were computed on.
+        parents: Parent positions from `parent_positions`.
+        max_levels: Number of level columns.
+    """
+    ancestors = ancestor_positions(parents, max_levels)
+    labels = df["label_clean"].to_numpy(dtype=object)
+    levels = {
+        f"Level_{i + 1}": _gather(labels, ancestors[:, i]) for i in range(max_levels)
+    }
+    return df.assign(**levels)
+
+
+def link_hierarchy(
+    df: pd.DataFrame, parents: np.ndarray, level_columns: int = 0
+) -> pd.DataFrame:
+    """
+    Adds the adjacency list (a dense `node_id` per row, the `parent_id` and
+    `parent_concept` of its parent), the nested-set `lft`/`rgt` bounds and `depth`
+    for range-scan subtree queries and, if requested, the `Level_N` ancestor labels.
+
+    Args:
+        df: Cleaned extract in taxonomy order.
+        parents: Parent position of every row (-1 for roots).
+        level_columns: Number of `Level_N` columns to add (0 adds none).
+    """
+    lft, rgt, depth = nested_set_bounds(parents)
+    df = df.assign(
+        node_id=np.arange(len(df), dtype=np.int32),
+        parent_id=parents.astype(np.int32),
+        parent_concept=_gather(df["Concept name"].to_numpy(dtype=object), parents),
+        depth=depth.astype(np.int32),
+        lft=lft.astype(np.int32),
+        rgt=rgt.astype(np.int32),
+    )
+    if level_columns:
+        df = add_level_columns(df, parents, level_columns)
+    return df
+
+
+def build_hierarchy(
+    df: pd.DataFrame, level_columns: int = 0
+) -> tuple[pd.DataFrame, np.ndarray]:
+    """
+    Builds the hierarchy frame (see `link_hierarchy`) from the row indents.
+
+    The parent of a row is the nearest previous row with a smaller indent, as with
+    a parent stack walked in row order; here it is computed on the `indent` array
+    and the outputs are integer gathers of `Concept name` and `label_clean`. In a
+    multi-sheet extract every sheet is its own tree: parents never cross a change
+    of `sheet_name`.
+
+    Args:
+        df: Cleaned extract in taxonomy order.
+        level_columns: Number of `Level_N` columns to add (0 adds none).
+
+    Returns:
+        The hierarchy frame and the parent position of every row (-1 for roots),
+        which is also its `parent_id`.
+    """
+    starts = block_starts(df["sheet_name"]) if "sheet_name" in df.columns else None
+    parents = parent_positions(df["indent"].to_numpy(dtype=np.int64), starts)
+    return link_hierarchy(df, parents, level_columns), parents
+
+
+def path_key_columns(df_materialized_path: pd.DataFrame) -> list[str]:
+    """
+    Returns the columns identifying a materialised path row: `full_path`, within its
+    `sheet_name` for multi-sheet extracts, where every sheet is a tree of its own
+    and may repeat the groups of another sheet.
+    """
+    if "sheet_name" in df_materialized_path.columns:
+        return ["sheet_name", "full_path"]
+    return ["full_path"]
+
+
+def qa_results(df_hierarchy: pd.DataFrame, df_materialized_path: pd.DataFrame) -> dict:
+    """Runs the automated QA checks of SECTION 5 on the hierarchy and path tables."""
+    path_keys = path_key_columns(df_materialized_path)
+    if len(path_keys) == 1:
+        unique_full_path = df_materialized_path["full_path"].is_unique
+    else:
+        unique_full_path = not df_materialized_path.duplicated(path_keys).any()
+    return {
+        "all_have_group_info": df_hierarchy["group_code"].notna().all()
+        and df_hierarchy["group_name"].notna().all(),
+        "indent_matches_int": pd.api.types.is_integer_dtype(df_hierarchy["indent"]),
+        "no_empty_labels_unless_abstract": df_hierarchy.loc[
+            df_hierarchy["Type"] != "abstract", "label_clean"
+        ]
+        .notna()
+        .all(),
+        "unique_full_path": unique_full_path,
+    }
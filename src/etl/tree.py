@@ -0,0 +1,410 @@
+"""
+Hierarchy outputs of the IFRS taxonomy ETL: materialised paths and the nested tree.
+
+Both are derived from the hierarchy frame and the parent positions returned by
+`transform.build_hierarchy`. Rows are in taxonomy order, so every parent precedes
+its children and a preorder walk of the tree visits the rows in frame order.
+"""
+
+from collections.abc import Iterator
+
+import numpy as np
+import pandas as pd
+
+import src.etl.transform as transform
+
+PATH_SEPARATOR = " > "
+
+# Node / materialised path field -> hierarchy column
+NODE_FIELDS = {
+    "excel_row": "excel_row",
+    "concept_name": "Concept name",
+    "preferred_label": "Preferred label",
+    "label": "label_clean",
+    "group_code": "group_code",
+    "group_name": "group_name",
+    "type": "Type",
+}
+# Governance fields, None when the column was not extracted
+OPTIONAL_NODE_FIELDS = {
+    "standard_label": "Standard label",
+    "documentation_label": "Documentation label",
+    "guidance_label": "Guidance label",
+    "references": "References",
+    "reference_links": "Reference Links",
+}
+# Source sheet, only in multi-sheet extracts where `excel_row` is not unique alone
+SHEET_FIELD = "sheet_name"
+MATERIALIZED_PATH_COLUMNS = ["full_path", *NODE_FIELDS, *OPTIONAL_NODE_FIELDS]
+
+
+def _is_blank(values: np.ndarray) -> np.ndarray:
+    """Whether each value of an object array is missing or an empty string."""
+    return pd.isna(values) | (values == "")
+
+
+def full_paths(df: pd.DataFrame, parents: np.ndarray) -> np.ndarray:
+    """
+    Computes the `full_path` of every row: its parent's path joined with its label.
+
+    A root's path starts with its group name (or group code), so paths stay unique
+    across sections. Paths are built one depth at a time from the parent positions.
+
+    Args:
+        df: Hierarchy frame in taxonomy order.
+        parents: Parent positions from `transform.build_hierarchy`.
+
+    Returns:
+        An object array of paths aligned with the rows of `df`.
+    """
+    return _join_paths(
+        df["group_name"].to_numpy(dtype=object),
+        df["group_code"].to_numpy(dtype=object),
+        df["label_clean"].to_numpy(dtype=object),
+        parents,
+    )
+
+
+def _join_paths(
+    group_name: np.ndarray,
+    group_code: np.ndarray,
+    labels: np.ndarray,
+    parents: np.ndarray,
+    root_prefix: str | None = None,
+) -> np.ndarray:
+    """
+    Joins paths down the parent positions, see `full_paths`. Roots are prefixed
+    with `root_prefix` when given (the parent path of a subtree) instead of their
+    group.
+    """
+    paths = np.empty(len(labels), dtype=object)
+    levels = transform.rows_by_depth(parents)
+    if levels and root_prefix is not None:
+        roots = levels[0]
+        paths[roots] = root_prefix + PATH_SEPARATOR + labels[roots]
+    elif levels:
+        base = np.where(_is_blank(group_name), group_code, group_name)
+        base = np.where(_is_blank(base), "", base)
+        roots = levels[0]
+        paths[roots] = np.where(
+            labels[roots] == "",
+            base[roots],
+            base[roots] + PATH_SEPARATOR + labels[roots],
+        )
+    for rows in levels[1:]:
+        paths[rows] = paths[parents[rows]] + PATH_SEPARATOR + labels[rows]
+    return paths
+
+
+def _field_columns(df: pd.DataFrame) -> dict[str, pd.Series]:
+    """
+    Returns the node fields of `df` as columns, with None for missing optional ones
+    and `sheet_name` first when the frame has it.
+    """
+    columns = {}
+    if SHEET_FIELD in df.columns:
+        columns[SHEET_FIELD] = df[SHEET_FIELD].reset_index(drop=True)
+    for field, col in {**NODE_FIELDS, **OPTIONAL_NODE_FIELDS}.items():
+        if col in df.columns:
+            columns[field] = df[col].reset_index(drop=True)
+        else:
+            columns[field] = pd.Series([None] * len(df), dtype=object)
+    return columns
+
+
+def closure_table(parents: np.ndarray) -> pd.DataFrame:
+    """
+    Builds the closure table of the hierarchy: one (ancestor_id, descendant_id,
+    distance) row per node and each of its ancestors, plus the node itself at
+    distance 0. Ids are the hierarchy `node_id`s (row positions).
+
+    The parent array is expanded one distance at a time: each step replaces the
+    ancestors found so far by their parents, dropping those that reached a root.
+    Rows are sorted by ancestor then descendant, so every subtree is one range.
+    """
+    descendants = [np.arange(len(parents), dtype=np.int32)]
+    ancestors = [descendants[0]]
+    distances = [np.zeros(len(parents), dtype=np.int32)]
+    current_desc = descendants[0]
+    current_anc = parents.astype(np.int32)
+    distance = 1
+    while True:
+        linked = current_anc >= 0
+        current_desc = current_desc[linked]
+        current_anc = current_anc[linked]
+        if not len(current_desc):
+            break
+        descendants.append(current_desc)
+        ancestors.append(current_anc)
+        distances.append(np.full(len(current_desc), distance, dtype=np.int32))
+        current_anc = parents[current_anc].astype(np.int32)
+        distance += 1
+
+    ancestor_id = np.concatenate(ancestors)
+    descendant_id = np.concatenate(descendants)
+    order = np.lexsort((descendant_id, ancestor_id))
+    return pd.DataFrame(
+        {
+            "ancestor_id": ancestor_id[order],
+            "descendant_id": descendant_id[order],
+            "distance": np.concatenate(distances)[order],
+        }
+    )
+
+
+def _path_columns(fields) -> list[str]:
+    """Returns the materialised path columns, with `sheet_name` when `fields` has it."""
+    if SHEET_FIELD in fields:
+        return ["full_path", SHEET_FIELD, *MATERIALIZED_PATH_COLUMNS[1:]]
+    return MATERIALIZED_PATH_COLUMNS
+
+
+def _python_values(values: pd.Series) -> list:
+    """Returns column values as Python objects, with None for missing strings."""
+    if isinstance(values.dtype, pd.StringDtype):
+        return values.astype(object).where(values.notna(), None).tolist()
+    return values.astype(object).tolist()
+
+
+def materialized_path_table(df: pd.DataFrame, paths: np.ndarray) -> pd.DataFrame:
+    """
+    Builds the materialised path table: one row per concept with its `full_path`
+    and governance fields, in taxonomy (tree preorder) order. Multi-sheet
+    extracts also get the `sheet_name` of each row.
+    """
+    # Paths share the dtype of the labels they are made of
+    full_path = pd.Series(paths, dtype=df["label_clean"].dtype)
+    columns = {"full_path": full_path, **_field_columns(df)}
+    return pd.DataFrame(columns)[_path_columns(columns)]
+
+
+def build_tree(df: pd.DataFrame, parents: np.ndarray, paths: np.ndarray) -> list[dict]:
+    """
+    Builds the nested taxonomy tree: a list of root nodes, each a dict of its
+    fields, `full_path` and `children`. Nodes of a multi-sheet extract also hold
+    their `sheet_name`.
+
+    Args:
+        df: Hierarchy frame in taxonomy order.
+        parents: Parent positions from `transform.build_hierarchy`.
+        paths: Paths from `full_paths`.
+    """
+    fields = {field: _python_values(values) for field, values in _field_columns(df).items()}
+    return _nest(fields, paths.tolist(), parents.tolist())
+
+
+def _nest(fields: dict[str, list], paths: list, parents: list) -> list[dict]:
+    """Links per-row node dicts into nested `children` lists by parent position."""
+    node_fields = [SHEET_FIELD, *NODE_FIELDS] if SHEET_FIELD in fields else list(NODE_FIELDS)
+    roots = []
+    nodes = []
+    for i, parent in enumerate(parents):
+        node = {field: fields[field][i] for field in node_fields}
+        node["full_path"] = paths[i]
+        for field in OPTIONAL_NODE_FIELDS:
+            node[field] = fields[field][i]
+        node["children"] = []
+        nodes.append(node)
+        if parent < 0:
+            roots.append(node)
+        else:
+            nodes[parent]["children"].append(node)
+    return roots
+
+
+def iter_preorder(tree: list[dict]) -> Iterator[dict]:
+    """Yields the nodes of a nested tree in preorder, with an explicit stack."""
+    stack = list(reversed(tree))
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(reversed(node["children"]))
+
+
+def flatten_tree_to_table(tree: list[dict]) -> pd.DataFrame:
+    """
+    Flattens a nested tree (e.g. a loaded `taxonomy_tree` JSON) back into the
+    materialised path table, one row per node in preorder.
+
+    The walk is iterative, so depth is not bounded by the recursion limit, and the
+    values are written straight into preallocated columns.
+    """
+    n_nodes = sum(1 for _ in iter_preorder(tree))
+    path_columns = _path_columns(tree[0] if tree else {})
+    columns = {col: np.empty(n_nodes, dtype=object) for col in path_columns}
+    for i, node in enumerate(iter_preorder(tree)):
+        for col, values in columns.items():
+            values[i] = node.get(col)
+    return pd.DataFrame(columns).infer_objects()
+
+
+class CompactTree:
+    """
+    Array-backed taxonomy tree.
+
+    Nodes are numbered in preorder (the hierarchy row order), so the subtree of
+    node i is the contiguous range [i, subtree_end[i]). Structure is held in int32
+    arrays (`parent`, `first_child`, `next_sibling`, `subtree_end`, -1 for none)
+    and every text field (`TEXT_FIELDS`, plus `sheet_name` for a multi-sheet
+    extract) as int32 codes into one shared string table.
+
+    Usage:
+        compact = CompactTree.from_frame(df_hierarchy, parent_index)
+        for child in compact.children(root):
+            ...
+        section = compact.subtree(root)
+        nested = section.to_nested()  # same shape as the taxonomy_tree JSON
+    """
+
+    TEXT_FIELDS = [
+        field for field in [*NODE_FIELDS, *OPTIONAL_NODE_FIELDS] if field != "excel_row"
+    ]
+
+    def __init__(
+        self,
+        parent: np.ndarray,
+        excel_row: np.ndarray,
+        codes: dict[str, np.ndarray],
+        strings: np.ndarray,
+        path_prefix: str | None = None,
+    ):
+        self.parent = parent.astype(np.int32)
+        # Path of the parent of a subtree's root; None for a whole taxonomy
+        self.path_prefix = path_prefix
+        self.excel_row = excel_row
+        self.codes = codes
+        self.strings = strings
+
+        n_nodes = len(self.parent)
+        positions = np.arange(n_nodes, dtype=np.int32)
+        self.subtree_end = positions + transform.subtree_sizes(self.parent).astype(np.int32)
+
+        self.first_child = np.full(n_nodes, -1, dtype=np.int32)
+        has_first_child = np.zeros(n_nodes, dtype=bool)
+        has_first_child[:-1] = self.parent[1:] == positions[:-1]
+        self.first_child[has_first_child] = positions[has_first_child] + 1
+
+        self.next_sibling = np.full(n_nodes, -1, dtype=np.int32)
+        after = self.subtree_end[self.subtree_end < n_nodes]
+        nodes_before = positions[self.subtree_end < n_nodes]
+        is_sibling = self.parent[after] == self.parent[nodes_before]
+        self.next_sibling[nodes_before[is_sibling]] = after[is_sibling]
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, parents: np.ndarray) -> "CompactTree":
+        """
+        Builds the tree from a hierarchy frame and its parent positions
+        (`transform.build_hierarchy`).
+        """
+        columns = _field_columns(df)
+        text_fields = [SHEET_FIELD] if SHEET_FIELD in columns else []
+        text_fields += cls.TEXT_FIELDS
+        text = [columns[field].to_numpy(dtype=object) for field in text_fields]
+        all_codes, strings = pd.factorize(
+            np.concatenate(text) if text else np.array([], dtype=object)
+        )
+        all_codes = all_codes.astype(np.int32)
+        codes = {
+            field: all_codes[i * len(df):(i + 1) * len(df)]
+            for i, field in enumerate(text_fields)
+        }
+        excel_row = columns["excel_row"].to_numpy(dtype=np.int64)
+        return cls(parents, excel_row, codes, np.asarray(strings, dtype=object))
+
+    def __len__(self) -> int:
+        return len(self.parent)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the arrays (the string table counts its pointers only)."""
+        arrays = [
+            self.parent,
+            self.first_child,
+            self.next_sibling,
+            self.subtree_end,
+            self.excel_row,
+            self.strings,
+            *self.codes.values(),
+        ]
+        return sum(array.nbytes for array in arrays)
+
+    def roots(self) -> np.ndarray:
+        """Returns the positions of the root nodes."""
+        return np.flatnonzero(self.parent < 0)
+
+    def children(self, node: int) -> Iterator[int]:
+        """Yields the positions of the children of a node, in order."""
+        child = self.first_child[node]
+        while child >= 0:
+            yield int(child)
+            child = self.next_sibling[child]
+
+    def iter_preorder(self, node: int | None = None) -> Iterator[int]:
+        """Yields node positions in preorder, for the whole tree or one subtree."""
+        start, end = (0, len(self)) if node is None else (node, self.subtree_end[node])
+        yield from range(start, end)
+
+    def value(self, field: str, node: int):
+        """Returns one field of a node; missing text values are None."""
+        if field == "excel_row":
+            return int(self.excel_row[node])
+        code = self.codes[field][node]
+        return self.strings[code] if code >= 0 else None
+
+    def subtree(self, node: int) -> "CompactTree":
+        """Returns the subtree rooted at a node as a tree of its own."""
+        end = self.subtree_end[node]
+        parent = self.parent[node:end] - node
+        parent[0] = -1
+        codes = {field: values[node:end] for field, values in self.codes.items()}
+        path_prefix = self.path_prefix
+        if self.parent[node] >= 0:
+            path_prefix = self.full_path(int(self.parent[node]))
+        return CompactTree(
+            parent, self.excel_row[node:end], codes, self.strings, path_prefix
+        )
+
+    def ancestors(self, node: int) -> list[int]:
+        """Returns the positions of a node's ancestors, root first."""
+        chain = []
+        node = self.parent[node]
+        while node >= 0:
+            chain.append(int(node))
+            node = self.parent[node]
+        return chain[::-1]
+
+    def full_path(self, node: int) -> str:
+        """Computes the `full_path` of a single node from its ancestors."""
+        chain = [*self.ancestors(node), node]
+        labels = [self.value("label", i) for i in chain]
+        if self.path_prefix is not None:
+            return PATH_SEPARATOR.join([self.path_prefix, *labels])
+        root = chain[0]
+        base = self.value("group_name", root) or self.value("group_code", root) or ""
+        if not labels[0]:
+            labels = labels[1:]
+        return PATH_SEPARATOR.join([base, *labels])
+
+    def _decoded(self, field: str) -> np.ndarray:
+        """Returns a text field as an object array, None where missing."""
+        codes = self.codes[field]
+        values = np.full(len(codes), None, dtype=object)
+        present = codes >= 0
+        values[present] = self.strings[codes[present]]
+        return values
+
+    def full_paths(self) -> np.ndarray:
+        """Computes the `full_path` of every node (see `full_paths`)."""
+        return _join_paths(
+            self._decoded("group_name"),
+            self._decoded("group_code"),
+            self._decoded("label"),
+            self.parent,
+            self.path_prefix,
+        )
+
+    def to_nested(self) -> list[dict]:
+        """Converts to the nested-dict shape of the `taxonomy_tree` JSON."""
+        fields = {field: self._decoded(field).tolist() for field in self.codes}
+        fields["excel_row"] = self.excel_row.tolist()
+        return _nest(fields, self.full_paths().tolist(), self.parent.tolist())
@@ -0,0 +1,354 @@
+"""
+Minimal streaming reader for .xlsx worksheets.
+
+Reads cell values and style ids straight from the worksheet XML with iterparse,
+without building openpyxl cell objects. The style table is parsed once so the
+alignment indent of any cell can be looked up from its `s=` attribute.
+"""
+
+import posixpath
+import zipfile
+from collections.abc import Callable, Iterator
+from pathlib import Path
+from typing import Any
+from xml.etree.ElementTree import Element, iterparse
+from xml.parsers import expat
+
+from openpyxl.styles.numbers import BUILTIN_FORMATS, is_date_format, is_timedelta_format
+from openpyxl.utils.datetime import (
+    CALENDAR_MAC_1904,
+    CALENDAR_WINDOWS_1900,
+    from_excel,
+    from_ISO8601,
+)
+
+MAIN_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+PKG_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+ROW_TAG = f"{MAIN_NS}row"
+CELL_TAG = f"{MAIN_NS}c"
+VALUE_TAG = f"{MAIN_NS}v"
+TEXT_TAG = f"{MAIN_NS}t"
+RUN_TAG = f"{MAIN_NS}r"
+SHARED_STRING_TAG = f"{MAIN_NS}si"
+
+# Element names as reported by expat with namespace_separator="}"
+SAX_ROW = ROW_TAG[1:]
+SAX_CELL = CELL_TAG[1:]
+SAX_VALUE = VALUE_TAG[1:]
+SAX_TEXT = TEXT_TAG[1:]
+SAX_PHONETIC = f"{MAIN_NS}rPh"[1:]
+SAX_DIMENSION = f"{MAIN_NS}dimension"[1:]
+
+PARSE_CHUNK_SIZE = 1 << 16
+
+
+def _read_relationships(zf: zipfile.ZipFile, rels_path: str) -> dict[str, dict[str, str]]:
+    """Returns the relationships of a package part keyed by relationship id."""
+    rels = {}
+    with zf.open(rels_path) as src:
+        for _, element in iterparse(src):
+            if element.tag == f"{PKG_REL_NS}Relationship":
+                rels[element.get("Id")] = {
+                    "type": element.get("Type", ""),
+                    "target": element.get("Target", ""),
+                }
+    return rels
+
+
+def _resolve_target(target: str) -> str:
+    """Resolves a workbook relationship target to a path inside the archive."""
+    if target.startswith("/"):
+        return target.lstrip("/")
+    return posixpath.normpath(posixpath.join("xl", target))
+
+
+def _text_content(element: Element) -> str:
+    """
+    Returns the plain text of a shared or inline string, ignoring phonetic runs.
+    Mirrors openpyxl so both extraction modes produce the same values.
+    """
+    snippets = []
+    for child in element:
+        if child.tag == TEXT_TAG:
+            snippets.append(child.text or "")
+        elif child.tag == RUN_TAG:
+            snippets.append(child.findtext(TEXT_TAG) or "")
+    return "".join(snippets).replace("x005F_", "")
+
+
+def _cast_number(value: str) -> int | float:
+    """Converts a numeric cell value to int or float, as openpyxl does."""
+    if "." in value or "E" in value or "e" in value:
+        return float(value)
+    return int(value)
+
+
+def column_index(reference: str) -> int:
+    """Converts a cell reference such as 'AB12' to a zero-based column index."""
+    index = 0
+    for char in reference:
+        if char.isdigit():
+            break
+        index = index * 26 + (ord(char.upper()) - 64)
+    return index - 1
+
+
+def _dimension_max_row(ref: str) -> int | None:
+    """Returns the last row of a dimension reference such as 'A1:L1520'."""
+    digits = "".join(char for char in ref.split(":")[-1] if char.isdigit())
+    return int(digits) if digits else None
+
+
+class XlsxSheetReader:
+    """
+    Streams the rows of one worksheet of an .xlsx file.
+
+    Usage:
+        with XlsxSheetReader(path, "Taxonomy ITI") as reader:
+            header_cells = reader.read_row(1)
+            for row_number, cells in reader.iter_rows(min_row=2, columns={0, 2}):
+                ...
+    """
+
+    def __init__(self, file_path: Path, sheet_name: str):
+        self.file_path = file_path
+        self.sheet_name = sheet_name
+        # Last row declared by the worksheet <dimension>, known once iteration starts
+        self.max_row = None
+        self._zf = zipfile.ZipFile(file_path)
+        try:
+            self._load_workbook_parts()
+        except Exception:
+            self._zf.close()
+            raise
+
+    def __enter__(self) -> "XlsxSheetReader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Closes the underlying archive."""
+        self._zf.close()
+
+    def _load_workbook_parts(self) -> None:
+        """Locates the worksheet part and loads shared strings and styles."""
+        rels = _read_relationships(self._zf, "xl/_rels/workbook.xml.rels")
+
+        self.epoch = CALENDAR_WINDOWS_1900
+        sheet_rel_id = None
+        with self._zf.open("xl/workbook.xml") as src:
+            for _, element in iterparse(src):
+                if element.tag == f"{MAIN_NS}workbookPr":
+                    if element.get("date1904") in ("1", "true"):
+                        self.epoch = CALENDAR_MAC_1904
+                elif element.tag == f"{MAIN_NS}sheet":
+                    if element.get("name") == self.sheet_name:
+                        sheet_rel_id = element.get(f"{REL_NS}id")
+        if sheet_rel_id is None or sheet_rel_id not in rels:
+            raise KeyError(f"Worksheet {self.sheet_name} does not exist.")
+        self.sheet_path = _resolve_target(rels[sheet_rel_id]["target"])
+
+        self.shared_strings = []
+        self.indents = [0]
+        self.date_styles = set()
+        self.timedelta_styles = set()
+        for rel in rels.values():
+            if rel["type"].endswith("/sharedStrings"):
+                self.shared_strings = self._read_shared_strings(
+                    _resolve_target(rel["target"])
+                )
+            elif rel["type"].endswith("/styles"):
+                self._read_styles(_resolve_target(rel["target"]))
+
+    def _read_shared_strings(self, part: str) -> list[str]:
+        """Reads the shared string table in document order."""
+        strings = []
+        with self._zf.open(part) as src:
+            for _, element in iterparse(src):
+                if element.tag == SHARED_STRING_TAG:
+                    strings.append(_text_content(element))
+                    element.clear()
+        return strings
+
+    def _read_styles(self, part: str) -> None:
+        """
+        Builds per-style lookups from styles.xml: the alignment indent of every cell
+        format (`cellXfs`), and which formats hold dates or durations.
+        """
+        custom_formats = {}
+        indents = []
+        date_styles = set()
+        timedelta_styles = set()
+        with self._zf.open(part) as src:
+            for _, element in iterparse(src):
+                if element.tag == f"{MAIN_NS}numFmt":
+                    custom_formats[int(element.get("numFmtId"))] = element.get("formatCode")
+                elif element.tag == f"{MAIN_NS}cellXfs":
+                    for style_id, xf in enumerate(element.iter(f"{MAIN_NS}xf")):
+                        alignment = xf.find(f"{MAIN_NS}alignment")
+                        indent = alignment.get("indent") if alignment is not None else None
+                        indents.append(int(float(indent)) if indent else 0)
+
+                        fmt_id = int(xf.get("numFmtId", 0))
+                        fmt = custom_formats.get(fmt_id, BUILTIN_FORMATS.get(fmt_id))
+                        if fmt and is_date_format(fmt):
+                            date_styles.add(style_id)
+                            if is_timedelta_format(fmt):
+                                timedelta_styles.add(style_id)
+                    element.clear()
+        self.indents = indents or [0]
+        self.date_styles = date_styles
+        self.timedelta_styles = timedelta_styles
+
+    def indent(self, style_id: int) -> int:
+        """Returns the alignment indent of a cell style id."""
+        if style_id < len(self.indents):
+            return self.indents[style_id]
+        return 0
+
+    def _decode(self, data_type: str, text: str | None, style_id: int) -> Any:
+        """Decodes the cached value of a cell, as openpyxl does with data_only=True."""
+        if data_type == "inlineStr":
+            return text
+        if not text:
+            return None
+        if data_type == "s":
+            return self.shared_strings[int(text)]
+        if data_type == "n":
+            number = _cast_number(text)
+            if style_id in self.date_styles:
+                try:
+                    return from_excel(
+                        number, self.epoch, timedelta=style_id in self.timedelta_styles
+                    )
+                except (OverflowError, ValueError):
+                    return "#VALUE!"
+            return number
+        if data_type == "b":
+            return bool(int(text))
+        if data_type == "d":
+            return from_ISO8601(text)
+        # "str" (formula result) and "e" (error) are kept as text
+        return text
+
+    def iter_rows(
+        self, min_row: int = 1, columns: set[int] | None = None
+    ) -> Iterator[tuple[int, dict[int, tuple[Any, int]]]]:
+        """
+        Yields (row number, cells) for every row element from `min_row` that contains
+        cells. `cells` maps zero-based column index to (value, style id).
+
+        Args:
+            min_row: First row to decode; earlier rows are skipped.
+            columns: Zero-based column indexes to decode. Cells in other columns are
+                skipped without resolving their value, but a row holding only such
+                cells is still reported (with no cells), as openpyxl would.
+
+        The worksheet is fed to an expat SAX parser in chunks, so only the rows of
+        the current chunk are held in memory.
+        """
+        handler = _SheetHandler(self._decode, min_row, columns)
+        parser = expat.ParserCreate(namespace_separator="}")
+        parser.buffer_text = True
+        parser.StartElementHandler = handler.start
+        parser.EndElementHandler = handler.end
+        parser.CharacterDataHandler = handler.data
+
+        with self._zf.open(self.sheet_path) as src:
+            while chunk := src.read(PARSE_CHUNK_SIZE):
+                parser.Parse(chunk, False)
+                if self.max_row is None and handler.dimension:
+                    self.max_row = _dimension_max_row(handler.dimension)
+                yield from handler.completed
+                handler.completed.clear()
+            parser.Parse(b"", True)
+            yield from handler.completed
+
+    def read_row(self, row_number: int) -> dict[int, tuple[Any, int]]:
+        """Returns the cells of a single row (e.g. the header), stopping the parse there."""
+        rows = self.iter_rows(min_row=row_number)
+        try:
+            current, cells = next(rows, (None, {}))
+        finally:
+            rows.close()
+        return cells if current == row_number else {}
+
+
+class _SheetHandler:
+    """SAX callbacks collecting the cells of each worksheet row."""
+
+    def __init__(
+        self,
+        decode: Callable[[str, str | None, int], Any],
+        min_row: int,
+        columns: set[int] | None,
+    ):
+        self.decode = decode
+        self.min_row = min_row
+        self.columns = columns
+        self.completed = []
+        self.row_counter = 0
+        self.col_counter = -1
+        self.cells = {}
+        self.row_has_cells = False
+        self.keep_row = False
+        self.keep_cell = False
+        self.data_type = "n"
+        self.style_id = 0
+        self.text = None
+        self.capture = False
+        self.in_phonetic = False
+        self.dimension = None
+
+    def start(self, name: str, attrs: dict) -> None:
+        if name == SAX_CELL:
+            ref = attrs.get("r")
+            self.col_counter = column_index(ref) if ref else self.col_counter + 1
+            self.row_has_cells = True
+            self.keep_cell = self.keep_row and (
+                self.columns is None or self.col_counter in self.columns
+            )
+            if self.keep_cell:
+                self.data_type = attrs.get("t", "n")
+                self.style_id = int(attrs.get("s", 0))
+                self.text = None
+        elif name == SAX_VALUE or (name == SAX_TEXT and not self.in_phonetic):
+            if self.keep_cell:
+                self.capture = True
+                if self.text is None:
+                    self.text = ""
+        elif name == SAX_ROW:
+            row_ref = attrs.get("r")
+            self.row_counter = int(float(row_ref)) if row_ref else self.row_counter + 1
+            self.col_counter = -1
+            self.cells = {}
+            self.row_has_cells = False
+            self.keep_row = self.row_counter >= self.min_row
+        elif name == SAX_PHONETIC:
+            self.in_phonetic = True
+        elif name == SAX_DIMENSION:
+            self.dimension = attrs.get("ref")
+
+    def end(self, name: str) -> None:
+        if name == SAX_VALUE or name == SAX_TEXT:
+            self.capture = False
+        elif name == SAX_CELL:
+            if self.keep_cell:
+                self.cells[self.col_counter] = (
+                    self.decode(self.data_type, self.text, self.style_id),
+                    self.style_id,
+                )
+                self.keep_cell = False
+        elif name == SAX_ROW:
+            if self.keep_row and self.row_has_cells:
+                self.completed.append((self.row_counter, self.cells))
+        elif name == SAX_PHONETIC:
+            self.in_phonetic = False
+
+    def data(self, text: str) -> None:
+        if self.capture:
+            self.text += text
@@ -0,0 +1,6 @@
+import sys
+from pathlib import Path
+
+# Add project root to the Python path, as the pipeline scripts do
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
@@ -0,0 +1,75 @@
+"""Tests of the batch runner in src/etl/ifrs_taxonomy_batch.py."""
+
+import json
+import sys
+
+import pandas as pd
+import pytest
+import yaml
+
+import src.etl.ifrs_taxonomy_batch as ifrs_taxonomy_batch
+import src.etl.ifrs_taxonomy_elt as ifrs_taxonomy_elt
+from tests.test_extract import SHEET, write_workbook
+
+CONFIG_PATH = "config/etl_ifrs_taxonomy_pipeline_config.yaml"
+
+
+@pytest.fixture
+def project_root(tmp_path, monkeypatch):
+    """A project with the shipped config and two editions, one of them missing."""
+    config = yaml.safe_load((ifrs_taxonomy_elt.get_project_root() / CONFIG_PATH).read_text())
+    config["source_files"] = [
+        {"edition": "2025", "filename": "taxonomy_2025.xlsx", "sheet_name": SHEET},
+        {"filename": "taxonomy_missing.xlsx", "sheet_name": SHEET},
+    ]
+    (tmp_path / "config").mkdir()
+    (tmp_path / CONFIG_PATH).write_text(yaml.safe_dump(config))
+    (tmp_path / "data" / "input").mkdir(parents=True)
+    write_workbook(tmp_path / "data" / "input" / "taxonomy_2025.xlsx")
+
+    monkeypatch.setattr(ifrs_taxonomy_elt, "get_project_root", lambda: tmp_path)
+    monkeypatch.setattr(sys, "argv", ["ifrs_taxonomy_batch", "--workers", "2"])
+    return tmp_path
+
+
+def test_importing_the_pipeline_leaves_pandas_options_alone():
+    # Copy-on-write is only switched on while run_pipeline runs the stages
+    assert pd.get_option("mode.copy_on_write") is False
+
+
+@pytest.mark.parametrize(
+    ("entry", "expected"),
+    [
+        ({"edition": "2024", "filename": "IFRSAT-2024.xlsx"}, "2024"),
+        ({"edition": 2023, "filename": "IFRSAT-2023.xlsx"}, "2023"),
+        ({"filename": "IFRSAT-2025.xlsx"}, "IFRSAT-2025"),
+    ],
+)
+def test_edition_name(entry, expected):
+    assert ifrs_taxonomy_batch.edition_name(entry) == expected
+
+
+def test_main_runs_each_edition_into_its_own_directory(project_root):
+    with pytest.raises(SystemExit) as exit_info:
+        ifrs_taxonomy_batch.main()
+    # The missing workbook fails the batch
+    assert exit_info.value.code == 1
+
+    [json_path] = (project_root / "logs").glob("batch_run_log_*.json")
+    batch_log = json.loads(json_path.read_text(encoding="utf-8"))
+    editions = {entry["edition"]: entry for entry in batch_log["editions"]}
+    assert list(editions) == ["2025", "taxonomy_missing"]
+
+    completed = editions["2025"]
+    assert completed["status"] == "completed"
+    assert completed["output_dir"] == str(project_root / "data" / "output" / "2025")
+    assert list((project_root / "data" / "output" / "2025").glob("df_materialized_path_*.csv"))
+    assert list((project_root / "logs" / "2025").glob("run_log_*.json"))
+
+    failed = editions["taxonomy_missing"]
+    assert failed["status"] == "error"
+    assert "FileNotFoundError" in failed["error"]
+    assert not (project_root / "data" / "output" / "taxonomy_missing").exists()
+
+    markdown = json_path.with_suffix(".md").read_text(encoding="utf-8")
+    assert "## Errors\n- taxonomy_missing: FileNotFoundError" in markdown
@@ -0,0 +1,103 @@
+"""Tests of the concept occurrence index in src/etl/concept_index.py."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import src.etl.concept_index as concept_index
+import src.etl.transform as transform
+import src.etl.tree as tree
+
+# Revenue occurs in two groups, Cash once; one row has no concept name
+CONCEPTS = [
+    "ifrs-full_Revenue",
+    "ifrs-full_Cash",
+    "ifrs-full_Revenue",
+    None,
+    "ifrs-full_Assets",
+]
+
+
+def hierarchy() -> tuple[pd.DataFrame, np.ndarray]:
+    """A small hierarchy frame with its full paths."""
+    df = pd.DataFrame(
+        {
+            "Concept name": pd.array(CONCEPTS, dtype=transform.STRING_DTYPE),
+            "label_clean": pd.array(
+                ["Revenue", "Cash", "Revenue", "Unnamed", "Assets"], dtype=transform.STRING_DTYPE
+            ),
+            "indent": np.array([0, 1, 0, 1, 1], dtype=np.int64),
+            "group_code": pd.Categorical(["110000", "110000", "210000", "210000", "210000"]),
+            "group_name": pd.Categorical(["General"] * 2 + ["Position"] * 3),
+            "Type": pd.Categorical(["monetary"] * 5),
+        }
+    )
+    df_hierarchy, parents = transform.build_hierarchy(df)
+    return df_hierarchy, tree.full_paths(df_hierarchy, parents)
+
+
+@pytest.fixture
+def index(tmp_path) -> concept_index.ConceptIndex:
+    df_hierarchy, paths = hierarchy()
+    path = tmp_path / "concept_index.parquet"
+    concept_index.build_concept_index(df_hierarchy, paths).to_parquet(path, index=False)
+    return concept_index.ConceptIndex.load(path)
+
+
+def test_index_table_sorted_by_concept():
+    df_hierarchy, paths = hierarchy()
+    df_index = concept_index.build_concept_index(df_hierarchy, paths)
+
+    assert list(df_index.columns) == concept_index.INDEX_COLUMNS
+    assert df_index["concept_name"].tolist() == [
+        "ifrs-full_Assets",
+        "ifrs-full_Cash",
+        "ifrs-full_Revenue",
+        "ifrs-full_Revenue",
+    ]
+    assert df_index["node_id"].dtype == np.int32
+
+
+def test_lookups_match_the_hierarchy(index):
+    df_hierarchy, paths = hierarchy()
+    assert len(index) == 3
+    for concept in ["ifrs-full_Revenue", "ifrs-full_Cash", "ifrs-full_Assets"]:
+        is_concept = df_hierarchy["Concept name"].eq(concept)
+        rows = np.flatnonzero(is_concept.to_numpy(dtype=bool, na_value=False))
+        assert concept in index
+        assert index.count(concept) == len(rows)
+        assert index.node_ids(concept).tolist() == df_hierarchy["node_id"].iloc[rows].tolist()
+        assert index.group_codes(concept) == df_hierarchy["group_code"].iloc[rows].tolist()
+        assert index.full_paths(concept) == paths[rows].tolist()
+        assert index.occurrences(concept) == [
+            {
+                "node_id": int(df_hierarchy["node_id"].iloc[row]),
+                "group_code": df_hierarchy["group_code"].iloc[row],
+                "full_path": paths[row],
+            }
+            for row in rows
+        ]
+
+
+def test_absent_concept_has_no_occurrences(index):
+    assert "ifrs-full_Missing" not in index
+    assert index.count("ifrs-full_Missing") == 0
+    assert index.node_ids("ifrs-full_Missing").tolist() == []
+    assert index.group_codes("ifrs-full_Missing") == []
+    assert index.full_paths("ifrs-full_Missing") == []
+    assert index.occurrences("ifrs-full_Missing") == []
+
+
+def test_multi_sheet_occurrences_hold_their_sheet(tmp_path):
+    df_hierarchy, paths = hierarchy()
+    df_hierarchy["sheet_name"] = ["Sheet1"] * 2 + ["Sheet2"] * 3
+    path = tmp_path / "concept_index.parquet"
+    df_index = concept_index.build_concept_index(df_hierarchy, paths)
+    df_index.to_parquet(path, index=False)
+    index = concept_index.ConceptIndex.load(path)
+
+    assert list(df_index.columns) == [*concept_index.INDEX_COLUMNS, "sheet_name"]
+    assert [occurrence["sheet_name"] for occurrence in index.occurrences("ifrs-full_Revenue")] == [
+        "Sheet1",
+        "Sheet2",
+    ]
@@ -0,0 +1,158 @@
+"""Tests of the worksheet extraction and the extract cache."""
+
+import logging
+
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+from openpyxl.styles import Alignment
+
+import src.etl.cache as cache
+import src.etl.extract as extract
+
+LOGGER = logging.getLogger("test_extract")
+SHEET = "Taxonomy"
+OPTIONAL_COLS = ["Standard label", "References"]
+
+ROWS = [
+    # (Concept name, Preferred label, indent, Type, Standard label)
+    ("[110000] General information", None, 0, None, None),
+    ("ifrs-full_General", "General information [abstract]", 0, None, "General"),
+    ("ifrs-full_Name", "Name of entity", 1, "text", "Name"),
+    ("ifrs-full_Domicile", "Domicile", 1, "text", None),
+    ("[210000] Statement of financial position", None, 0, None, None),
+    ("ifrs-full_Assets", "Assets [abstract]", 0, None, "Assets"),
+    ("ifrs-full_Cash", "Cash", 2, "monetary", "Cash"),
+    ("ifrs-full_Receivables", "Trade receivables", 3, "monetary", None),
+    ("ifrs-full_Total", "Total assets", 1, "monetary", "Total assets"),
+]
+
+
+def write_workbook(path, rows=ROWS, trailing_blank_rows: int = 0, headers=None):
+    """Writes a taxonomy sheet, with label indents set as cell alignment."""
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.title = SHEET
+    sheet.append(headers or ["Concept name", "Preferred label", "Type", "Standard label"])
+    for concept, label, indent, type_, standard in rows:
+        sheet.append([concept, label, type_, standard])
+        sheet.cell(row=sheet.max_row, column=2).alignment = Alignment(indent=indent)
+    if trailing_blank_rows:
+        # Formatted but empty cells push max_row past the data
+        last = sheet.max_row + trailing_blank_rows
+        sheet.cell(row=last, column=2).alignment = Alignment(indent=1)
+    workbook.save(path)
+    return path
+
+
+@pytest.fixture
+def workbook_path(tmp_path):
+    return write_workbook(tmp_path / "taxonomy.xlsx")
+
+
+def test_full_extract_reads_values_and_indents(workbook_path):
+    df = extract.extract_taxonomy_sheet(workbook_path, SHEET, OPTIONAL_COLS, LOGGER)
+
+    assert df["Concept name"].tolist() == [row[0] for row in ROWS]
+    assert df["indent"].tolist() == [row[2] for row in ROWS]
+    assert df["excel_row"].tolist() == list(range(2, len(ROWS) + 2))
+    # Optional columns missing from the sheet are all null
+    assert df["References"].isna().all()
+
+
+@pytest.mark.parametrize("mode", ["read_only", "xml"])
+def test_extraction_modes_match_full(workbook_path, mode):
+    expected = extract.extract_taxonomy_sheet(workbook_path, SHEET, OPTIONAL_COLS, LOGGER)
+    result = extract.extract_taxonomy_sheet(
+        workbook_path, SHEET, OPTIONAL_COLS, LOGGER, mode=mode
+    )
+    pd.testing.assert_frame_equal(result, expected)
+
+
+@pytest.mark.parametrize("mode", extract.EXTRACTION_MODES)
+def test_empty_row_stop_drops_trailing_rows(tmp_path, mode):
+    path = write_workbook(tmp_path / "padded.xlsx", trailing_blank_rows=50)
+    df = extract.extract_taxonomy_sheet(
+        path, SHEET, OPTIONAL_COLS, LOGGER, mode=mode, empty_row_stop=10
+    )
+    assert len(df) == len(ROWS)
+    assert df.attrs["extraction"]["last_data_row"] == len(ROWS) + 1
+
+
+@pytest.mark.parametrize("mode", extract.EXTRACTION_MODES)
+@pytest.mark.parametrize("batch_size", [1, 4, 100])
+def test_batches_concatenate_to_whole_sheet(workbook_path, mode, batch_size):
+    expected = extract.extract_taxonomy_sheet(
+        workbook_path, SHEET, OPTIONAL_COLS, LOGGER, mode=mode
+    )
+    batches = list(
+        extract.iter_extract_batches(
+            workbook_path, SHEET, OPTIONAL_COLS, LOGGER, mode=mode, batch_size=batch_size
+        )
+    )
+    pd.testing.assert_frame_equal(pd.concat(batches), expected)
+
+
+def test_missing_preferred_label_column_raises(tmp_path):
+    path = write_workbook(
+        tmp_path / "no_label.xlsx", headers=["Concept name", "Label", "Type", "Standard label"]
+    )
+    with pytest.raises(ValueError, match="Preferred label"):
+        extract.extract_taxonomy_sheet(path, SHEET, OPTIONAL_COLS, LOGGER)
+
+
+def test_cache_round_trip(workbook_path, tmp_path):
+    df = extract.extract_taxonomy_sheet(workbook_path, SHEET, OPTIONAL_COLS, LOGGER)
+    cache_path = tmp_path / "cache" / "extract.parquet"
+
+    assert cache.save_frame(df, cache_path, LOGGER)
+    loaded = cache.load_frame(cache_path, LOGGER)
+    pd.testing.assert_frame_equal(loaded, df)
+    assert cache.load_frame(tmp_path / "cache" / "missing.parquet", LOGGER) is None
+
+
+def test_cache_key_follows_content_and_params(workbook_path, tmp_path):
+    key = cache.cache_key(workbook_path, {"sheet_name": SHEET})
+    assert key == cache.cache_key(workbook_path, {"sheet_name": SHEET})
+    assert key != cache.cache_key(workbook_path, {"sheet_name": "Other"})
+
+    edited = write_workbook(tmp_path / "edited.xlsx", rows=ROWS[:-1])
+    assert key != cache.cache_key(edited, {"sheet_name": SHEET})
+
+
+def test_cache_key_reuses_a_known_file_digest(workbook_path):
+    digest = cache.file_sha256(workbook_path)
+    params = {"sheet_name": SHEET}
+    assert cache.cache_key(workbook_path, params, digest) == cache.cache_key(workbook_path, params)
+
+
+def test_stream_sheets_fills_then_reads_cache(workbook_path, tmp_path):
+    cache_dir = tmp_path / "intermediate"
+
+    def stream():
+        statuses, batches = extract.stream_sheets(
+            workbook_path, [SHEET], OPTIONAL_COLS, LOGGER, batch_size=4, cache_dir=cache_dir
+        )
+        return statuses, pd.concat([batch for _, batch in batches])
+
+    first_statuses, first = stream()
+    second_statuses, second = stream()
+
+    assert first_statuses == {SHEET: "miss"}
+    assert second_statuses == {SHEET: "hit"}
+    pd.testing.assert_frame_equal(second, first)
+    assert second.attrs == first.attrs
+
+
+def test_cache_entry_depends_on_extraction_mode(workbook_path, tmp_path):
+    cache_dir = tmp_path / "intermediate"
+    full_statuses, batches = extract.stream_sheets(
+        workbook_path, [SHEET], OPTIONAL_COLS, LOGGER, mode="full", cache_dir=cache_dir
+    )
+    list(batches)
+    xml_statuses, _ = extract.stream_sheets(
+        workbook_path, [SHEET], OPTIONAL_COLS, LOGGER, mode="xml", cache_dir=cache_dir
+    )
+
+    assert full_statuses == {SHEET: "miss"}
+    assert xml_statuses == {SHEET: "miss"}
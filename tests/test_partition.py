@@ -0,0 +1,124 @@
+"""Tests of the per-group partitioned transform and the changed-groups report."""
+
+import logging
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import src.etl.partition as partition
+import src.etl.transform as transform
+import src.etl.tree as tree
+
+LOGGER = logging.getLogger("test_partition")
+ETL_VERSION = "test"
+ETL_VERSION = "test"
+
+
+def grouped_frame(n_groups: int = 6, group_size: int = 40, seed: int = 0) -> pd.DataFrame:
+    """A cleaned extract of several groups, each starting with a root row."""
+    rng = np.random.default_rng(seed)
+    n_rows = n_groups * group_size
+    indent = np.clip(np.cumsum(rng.choice([-2, -1, 0, 1, 1], size=n_rows)), 0, 5)
+    indent[::group_size] = 0
+    codes = np.repeat([f"{110000 + 10000 * i}" for i in range(n_groups)], group_size)
+    df = pd.DataFrame(
+        {
+            "excel_row": np.arange(n_rows) + 2,
+            "Concept name": [f"ifrs-full_Concept{i}" for i in range(n_rows)],
+            "label_clean": [f"Label {i % group_size}" for i in range(n_rows)],
+            "indent": indent,
+            "group_code": codes,
+            "group_name": [f"Group {code}" for code in codes],
+            "Type": rng.choice(["abstract", "monetary", "text"], size=n_rows),
+        }
+    )
+    for col in ["Concept name", "label_clean", "group_code", "group_name", "Type"]:
+        df[col] = df[col].astype(transform.STRING_DTYPE)
+    return df
+
+
+@pytest.mark.parametrize("max_workers", [None, 2])
+def test_partitioned_matches_global_build(max_workers):
+    df = grouped_frame()
+    expected, expected_parents = transform.build_hierarchy(df, level_columns=3)
+    result, parents, paths, group_qa = partition.build_hierarchy_by_group(
+        df, LOGGER, level_columns=3, max_workers=max_workers
+    )
+
+    pd.testing.assert_frame_equal(result, expected)
+    np.testing.assert_array_equal(parents, expected_parents)
+    assert paths.tolist() == tree.full_paths(expected, expected_parents).tolist()
+    assert [group["group_code"] for group in group_qa] == df["group_code"].unique().tolist()
+    assert all(all(group["qa"].values()) for group in group_qa)
+
+
+def test_group_starts_are_barriers():
+    df = grouped_frame()
+    # A group starting below the root level is not linked into the previous group
+    df.loc[40, "indent"] = 3
+    _, parents, _, _ = partition.build_hierarchy_by_group(df, LOGGER)
+    group_start = np.repeat(np.arange(0, len(df), 40), 40)
+    linked = parents >= 0
+    assert (parents[linked] >= group_start[linked]).all()
+    assert parents[40] == -1
+
+
+def test_group_qa_flags_only_the_failing_group():
+    df = grouped_frame(n_groups=3)
+    # Two siblings with the same label in group 1; group 2 gets an unlabelled row
+    df.loc[[41, 42], "indent"] = 1
+    df.loc[[41, 42], "label_clean"] = "Same label"
+    starts = partition.group_starts(df)
+    parents = transform.parent_positions(df["indent"].to_numpy(dtype=np.int64), starts)
+    paths = tree.full_paths(df, parents)
+    df.loc[85, "label_clean"] = pd.NA
+    df.loc[85, "Type"] = "text"
+
+    qa = partition.group_qa_results(df, paths, starts)
+    assert [group["unique_full_path"] for group in qa] == [True, False, True]
+    assert [group["no_empty_labels_unless_abstract"] for group in qa] == [True, True, False]
+
+
+def test_changed_groups_report():
+    df = grouped_frame(n_groups=4)
+    previous = partition.group_fingerprints(df)
+    assert list(previous) == df["group_code"].unique().tolist()
+    assert partition.changed_groups(previous, previous) == {
+        "changed": [],
+        "added": [],
+        "removed": [],
+    }
+
+    # Relabel a row of group 1, drop group 3 and add a new group
+    df.loc[45, "label_clean"] = "Relabelled"
+    df = df[df["group_code"] != "140000"].copy()
+    df.loc[df.index[-1] + 1] = {**df.iloc[0].to_dict(), "group_code": "990000"}
+    current = partition.group_fingerprints(df)
+    assert partition.changed_groups(previous, current) == {
+        "changed": ["120000"],
+        "added": ["990000"],
+        "removed": ["140000"],
+    }
+
+
+def test_group_keys_hold_sheet_and_repeated_codes():
+    df = pd.concat([grouped_frame(n_groups=2), grouped_frame(n_groups=2)], ignore_index=True)
+    assert list(partition.group_fingerprints(df)) == ["110000", "120000", "110000#2", "120000#2"]
+
+    df["sheet_name"] = ["Sheet1"] * 80 + ["Sheet2"] * 80
+    assert list(partition.group_fingerprints(df)) == [
+        "Sheet1/110000",
+        "Sheet1/120000",
+        "Sheet2/110000",
+        "Sheet2/120000",
+    ]
+
+
+def test_group_fingerprints_ignored_for_another_version(tmp_path):
+    fingerprints = partition.group_fingerprints(grouped_frame())
+    assert partition.load_group_fingerprints(tmp_path, ETL_VERSION, LOGGER) is None
+
+    partition.save_group_fingerprints(fingerprints, tmp_path, ETL_VERSION)
+    assert partition.load_group_fingerprints(tmp_path, ETL_VERSION, LOGGER) == fingerprints
+    assert partition.load_group_fingerprints(tmp_path, "other", LOGGER) is None
@@ -0,0 +1,181 @@
+"""Equivalence of the Polars engine with the pandas transforms and QA checks."""
+
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import src.etl.transform as transform
+
+pytest.importorskip("polars")
+import src.etl.polars_engine as polars_engine  # noqa: E402
+
+HEADER_PATTERN = re.compile(transform.DEFAULT_HEADER_PATTERN)
+
+CONCEPT_NAMES = [
+    "ifrs-full_Leading",
+    "[110000] General information",
+    "ifrs-full_Abstract",
+    "ifrs-full_Name",
+    "ifrs-full_Blank",
+    "[210000] Statement of financial position",
+    "ifrs-full_Assets",
+    "ifrs-full_Cash",
+]
+LABELS = [
+    "Leading row",
+    None,
+    "  General information [abstract]",
+    "Name of entity ",
+    None,
+    None,
+    "Assets [abstract]",
+    "Cash",
+]
+TYPES = [None, None, None, "text", None, None, None, "monetary"]
+
+
+def missing_as_none(carry: tuple | None) -> tuple | None:
+    """Carries compare equal whatever missing-value marker an engine uses."""
+    return carry and tuple(None if pd.isna(value) else value for value in carry)
+
+
+def raw_frame(label_dtype=transform.STRING_DTYPE, n_sheets: int = 1) -> pd.DataFrame:
+    """A raw extract: two groups per sheet, an untyped row before the first header."""
+    n_rows = len(CONCEPT_NAMES)
+    df = pd.DataFrame(
+        {
+            "excel_row": np.arange(n_rows * n_sheets) + 2,
+            "Concept name": pd.array(CONCEPT_NAMES * n_sheets, dtype=transform.STRING_DTYPE),
+            "Preferred label": pd.array(LABELS * n_sheets, dtype=label_dtype),
+            "indent": np.tile([0, 0, 0, 1, 1, 0, 0, 1], n_sheets),
+            "Type": pd.array(TYPES * n_sheets, dtype=transform.STRING_DTYPE),
+        }
+    )
+    if n_sheets > 1:
+        df["sheet_name"] = np.repeat([f"Sheet{i}" for i in range(n_sheets)], n_rows)
+    return df
+
+
+@pytest.mark.parametrize("n_sheets", [1, 2])
+@pytest.mark.parametrize("header_prefix", ["[", ""])
+@pytest.mark.parametrize("carry", [None, ("100000", "Carried")])
+def test_assign_group_headers_matches_pandas(n_sheets, header_prefix, carry):
+    df = raw_frame(n_sheets=n_sheets)
+    expected, expected_carry = transform.assign_group_headers(
+        df, HEADER_PATTERN, carry, header_prefix
+    )
+    result, result_carry = polars_engine.assign_group_headers(
+        df, HEADER_PATTERN, carry, header_prefix
+    )
+    pd.testing.assert_frame_equal(result, expected)
+    assert missing_as_none(result_carry) == missing_as_none(expected_carry)
+
+
+def test_assign_group_headers_resets_at_sheet_start():
+    df = raw_frame(n_sheets=2)
+    result, _ = polars_engine.assign_group_headers(df, HEADER_PATTERN, ("100000", "Carried"))
+    second_sheet_first_row = len(CONCEPT_NAMES)
+    assert result["group_code"].iloc[0] == "100000"
+    assert pd.isna(result["group_code"].iloc[second_sheet_first_row])
+
+
+@pytest.mark.parametrize("label_dtype", [transform.STRING_DTYPE, object])
+@pytest.mark.parametrize("missing_type", [False, True])
+def test_clean_labels_matches_pandas(label_dtype, missing_type):
+    df = raw_frame(label_dtype=label_dtype)
+    if missing_type:
+        df["Type"] = pd.Series([None] * len(df), dtype=object)
+    df, _ = transform.assign_group_headers(df, HEADER_PATTERN)
+    pd.testing.assert_frame_equal(
+        polars_engine.clean_labels(df), transform.clean_labels(df)
+    )
+
+
+def test_clean_labels_empty_frame():
+    df = raw_frame().iloc[:0]
+    pd.testing.assert_frame_equal(
+        polars_engine.clean_labels(df), transform.clean_labels(df)
+    )
+
+
+@pytest.mark.parametrize("n_sheets", [1, 2])
+@pytest.mark.parametrize("header_prefix", ["[", ""])
+@pytest.mark.parametrize("batch_size", [3, 100])
+def test_group_and_clean_matches_pandas_batches(n_sheets, header_prefix, batch_size):
+    df = raw_frame(n_sheets=n_sheets)
+    expected, result = [], []
+    expected_carry = result_carry = None
+    for start in range(0, len(df), batch_size):
+        batch = df.iloc[start:start + batch_size]
+        grouped, expected_carry = transform.assign_group_headers(
+            batch, HEADER_PATTERN, expected_carry, header_prefix
+        )
+        expected.append(transform.clean_labels(grouped))
+        cleaned, result_carry = polars_engine.group_and_clean(
+            batch, HEADER_PATTERN, result_carry, header_prefix
+        )
+        result.append(cleaned)
+        assert missing_as_none(result_carry) == missing_as_none(expected_carry)
+    pd.testing.assert_frame_equal(pd.concat(result), pd.concat(expected))
+
+
+def hierarchy_frames(
+    duplicate_path: bool = False,
+    empty_label: bool = False,
+    missing_group: bool = False,
+    sheets: list[str] | None = None,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """A hierarchy and path table with the dtypes of the pipeline outputs."""
+    labels = ["General information", "Name", "Address", "Assets"]
+    paths = [
+        "General information",
+        "General information > Name",
+        "General information > Address",
+        "Assets",
+    ]
+    group_codes = ["110000", "110000", "110000", "210000"]
+    if duplicate_path:
+        paths[2] = paths[1]
+    if empty_label:
+        labels[1] = None
+    if missing_group:
+        group_codes[3] = None
+    df_hierarchy = pd.DataFrame(
+        {
+            "indent": np.array([0, 1, 1, 0], dtype=np.int64),
+            "group_code": pd.Categorical(group_codes),
+            "group_name": pd.Categorical(["General", "General", "General", "Position"]),
+            "Type": pd.Categorical(["abstract", "text", "text", "abstract"]),
+            "label_clean": pd.array(labels, dtype=transform.STRING_DTYPE),
+        }
+    )
+    df_materialized_path = pd.DataFrame(
+        {"full_path": pd.array(paths, dtype=transform.STRING_DTYPE)}
+    )
+    if sheets is not None:
+        df_materialized_path.insert(
+            0, "sheet_name", pd.array(sheets, dtype=transform.STRING_DTYPE)
+        )
+    return df_hierarchy, df_materialized_path
+
+
+@pytest.mark.parametrize(
+    ("failure", "passes"),
+    [
+        ({}, True),
+        ({"duplicate_path": True}, False),
+        ({"empty_label": True}, False),
+        ({"missing_group": True}, False),
+        # The duplicated path is in another sheet, then in the same sheet
+        ({"duplicate_path": True, "sheets": ["a", "a", "b", "b"]}, True),
+        ({"duplicate_path": True, "sheets": ["a", "b", "b", "b"]}, False),
+    ],
+)
+def test_qa_results_matches_pandas(failure, passes):
+    df_hierarchy, df_materialized_path = hierarchy_frames(**failure)
+    expected = transform.qa_results(df_hierarchy, df_materialized_path)
+    result = polars_engine.qa_results(df_hierarchy, df_materialized_path)
+    assert {k: bool(v) for k, v in result.items()} == {k: bool(v) for k, v in expected.items()}
+    assert all(expected.values()) == passes
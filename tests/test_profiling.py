@@ -0,0 +1,75 @@
+"""Tests of the per-stage memory profiler in src/etl/profiling.py."""
+
+import logging
+import threading
+import tracemalloc
+
+import numpy as np
+import pytest
+
+import src.etl.profiling as profiling
+import src.etl.stages as stages
+
+LOGGER = logging.getLogger("test_profiling")
+
+
+def sampler_threads() -> list[threading.Thread]:
+    """Returns the live memory sampler threads."""
+    return [
+        thread
+        for thread in threading.enumerate()
+        if thread.name == profiling.SAMPLER_THREAD_NAME
+    ]
+
+
+@pytest.fixture
+def memory():
+    memory = profiling.StageMemory(LOGGER, enabled=True)
+    yield memory
+    memory.stop()
+
+
+def test_records_traced_arrow_and_rss_peaks(memory):
+    memory.start_stage("allocate")
+    assert len(sampler_threads()) == 1
+    values = np.ones(1 << 20)
+    peaks = memory.end_stage("allocate")
+    del values
+
+    assert sampler_threads() == []
+    assert set(peaks) == {"traced", "arrow", "rss"}
+    assert peaks["traced"] >= 8
+    assert peaks["rss"] > 0
+    assert memory.peaks_mib == {"allocate": peaks}
+
+
+def test_disabled_profiler_records_nothing():
+    memory = profiling.StageMemory(LOGGER)
+    memory.start_stage("stage")
+    assert memory.end_stage("stage") is None
+    assert sampler_threads() == []
+    assert memory.peaks_mib == {}
+
+
+def test_raising_stage_leaves_no_sampler_thread(memory, tmp_path):
+    def failing_stage(context):
+        raise RuntimeError("stage failed")
+
+    with pytest.raises(RuntimeError, match="stage failed"):
+        stages.run_stages(
+            [stages.Stage("failing", failing_stage, (), ("x",))],
+            {"config": {}},
+            {},
+            LOGGER,
+            checkpoint_dir=tmp_path,
+            memory=memory,
+        )
+    assert sampler_threads() == []
+    assert "failing" in memory.peaks_mib
+
+
+def test_stop_ends_sampling_and_tracing(memory):
+    memory.start_stage("interrupted")
+    memory.stop()
+    assert sampler_threads() == []
+    assert not tracemalloc.is_tracing()
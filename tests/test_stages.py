@@ -0,0 +1,135 @@
+"""Tests of the checkpointed stage runner in src/etl/stages.py."""
+
+import gc
+import logging
+import weakref
+
+import pytest
+
+import src.etl.stages as stages
+
+LOGGER = logging.getLogger("test_stages")
+
+
+class Artifact:
+    """A weak-referenceable stage output."""
+
+    def __init__(self, value):
+        self.value = value
+
+
+def pipeline(calls: list[str], probe: dict | None = None) -> list[stages.Stage]:
+    """Stages a -> b -> c, c a sink, recording their calls in `calls`."""
+
+    def stage_a(context, source):
+        calls.append("a")
+        return {"x": Artifact(source + context["config"]["offset"])}
+
+    def stage_b(context, x):
+        calls.append("b")
+        if probe is not None:
+            probe["x"] = weakref.ref(x)
+        return {"y": Artifact(x.value * context["config"]["factor"])}
+
+    def stage_c(context, y):
+        calls.append("c")
+        if probe is not None:
+            gc.collect()
+            probe["x_alive_in_c"] = probe["x"]() is not None
+        return {"z": Artifact(y.value + 1)}
+
+    return [
+        stages.Stage("a", stage_a, ("source",), ("x",), ("offset",)),
+        stages.Stage("b", stage_b, ("x",), ("y",), ("factor",)),
+        stages.Stage("c", stage_c, ("y",), ("z",), checkpoint=False),
+    ]
+
+
+def run(tmp_path, calls, config=None, probe=None, **kwargs) -> dict:
+    """Runs the pipeline on source 1 with checkpoints in `tmp_path`."""
+    context = {"config": {"offset": 1, "factor": 10, **(config or {})}}
+    return stages.run_stages(
+        pipeline(calls, probe),
+        context,
+        {"source": (1, "source-fingerprint")},
+        LOGGER,
+        checkpoint_dir=tmp_path,
+        **kwargs,
+    )
+
+
+def test_runs_every_stage_and_returns_unconsumed_artifacts(tmp_path):
+    calls = []
+    artifacts = run(tmp_path, calls)
+    assert calls == ["a", "b", "c"]
+    assert list(artifacts) == ["z"]
+    assert artifacts["z"].value == 21
+
+
+def test_resume_skips_unchanged_stages(tmp_path, caplog):
+    run(tmp_path, [])
+    calls = []
+    with caplog.at_level(logging.INFO, logger=LOGGER.name):
+        artifacts = run(tmp_path, calls, resume=True)
+    # Only the sink runs; of the skipped outputs only its input is loaded
+    assert calls == ["c"]
+    assert "Stage 'a' unchanged: skipped." in caplog.text
+    assert "Stage 'b' unchanged: loaded from checkpoint." in caplog.text
+    assert artifacts["z"].value == 21
+
+
+def test_resume_without_checkpoints_runs_everything(tmp_path):
+    run(tmp_path, [], save_checkpoints=False)
+    calls = []
+    run(tmp_path, calls, resume=True)
+    assert calls == ["a", "b", "c"]
+
+
+def test_from_stage_reruns_that_stage_and_later_ones(tmp_path):
+    run(tmp_path, [])
+    calls = []
+    artifacts = run(tmp_path, calls, from_stage="b")
+    assert calls == ["b", "c"]
+    assert artifacts["z"].value == 21
+
+
+def test_unknown_from_stage_raises(tmp_path):
+    with pytest.raises(ValueError, match="Unknown stage"):
+        run(tmp_path, [], from_stage="missing")
+
+
+def test_config_change_recomputes_stale_stages(tmp_path):
+    run(tmp_path, [])
+    calls = []
+    # `factor` is read by b only: a stays checkpointed, b and its consumer c rerun
+    artifacts = run(tmp_path, calls, config={"factor": 100}, resume=True)
+    assert calls == ["b", "c"]
+    assert artifacts["z"].value == 201
+
+    calls.clear()
+    run(tmp_path, calls, config={"factor": 100}, resume=True)
+    assert calls == ["c"]
+
+
+def test_fingerprint_follows_config_keys_and_inputs():
+    stage = stages.Stage("b", lambda context, x: {}, ("x",), ("y",), ("factor",))
+    base = stages.stage_fingerprint(stage, {"factor": 1}, {"x": "1"})
+    assert base == stages.stage_fingerprint(stage, {"factor": 1, "other": 2}, {"x": "1"})
+    assert base != stages.stage_fingerprint(stage, {"factor": 2}, {"x": "1"})
+    assert base != stages.stage_fingerprint(stage, {"factor": 1}, {"x": "2"})
+
+
+def test_partial_checkpoint_never_matches(tmp_path):
+    stage = pipeline([])[0]
+    stages.save_checkpoint(tmp_path, stage, "fingerprint", {"x": Artifact(1)})
+    assert stages.checkpoint_fingerprint(tmp_path, stage) == "fingerprint"
+    assert stages.load_checkpoint(tmp_path, "a", ["x"])["x"].value == 1
+
+    (tmp_path / "a" / "x.pkl").unlink()
+    assert stages.checkpoint_fingerprint(tmp_path, stage) is None
+
+
+def test_artifacts_released_after_last_consumer(tmp_path):
+    probe = {}
+    run(tmp_path, [], probe=probe, save_checkpoints=False)
+    assert probe["x_alive_in_c"] is False
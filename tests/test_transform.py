@@ -0,0 +1,156 @@
+"""Tests of the hierarchy and row-local transforms in src/etl/transform.py."""
+
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import src.etl.transform as transform
+
+MAX_LEVELS = 5
+
+
+def legacy_build_hierarchy(df: pd.DataFrame, max_levels: int = MAX_LEVELS) -> pd.DataFrame:
+    """The original parent-stack implementation, walked with iterrows."""
+    df = df.copy()
+    parent_stack = []
+    parent_concepts = []
+    level_columns = {f"Level_{i + 1}": [] for i in range(max_levels)}
+    for _, row in df.iterrows():
+        level = row["indent"]
+        concept_name = row["Concept name"]
+        label = row["label_clean"]
+        while parent_stack and parent_stack[-1][0] >= level:
+            parent_stack.pop()
+        parent_concept = parent_stack[-1][1] if parent_stack else None
+        parent_concepts.append(parent_concept)
+        for i in range(max_levels):
+            if i < len(parent_stack):
+                level_columns[f"Level_{i + 1}"].append(parent_stack[i][2])
+            else:
+                level_columns[f"Level_{i + 1}"].append(None)
+        parent_stack.append((level, concept_name, label))
+    df["parent_concept"] = parent_concepts
+    for col, values in level_columns.items():
+        df[col] = values
+    return df
+
+
+def indent_frame(indent: np.ndarray) -> pd.DataFrame:
+    """A cleaned extract with the given indents and unique concepts and labels."""
+    n_rows = len(indent)
+    return pd.DataFrame(
+        {
+            "Concept name": [f"concept_{i}" for i in range(n_rows)],
+            "label_clean": [f"Label {i}" for i in range(n_rows)],
+            "indent": np.asarray(indent, dtype=np.int64),
+        }
+    )
+
+
+def random_indents(seed: int, n_rows: int = 300) -> np.ndarray:
+    """Indents that step down, stay, go up one or jump several levels."""
+    rng = np.random.default_rng(seed)
+    steps = rng.choice([-3, -1, 0, 1, 1, 2], size=n_rows)
+    return np.clip(np.cumsum(steps), 0, 8)
+
+
+INDENT_CASES = [
+    *[random_indents(seed) for seed in range(5)],
+    np.array([0, 1, 2, 3, 4, 5, 6]),  # deeper than MAX_LEVELS
+    np.array([2, 1, 0, 1, 0]),  # starts below the root level
+    np.array([1, 1, 1]),  # only roots
+    np.array([0, 2, 2, 1, 3]),  # skipped levels
+    np.array([], dtype=np.int64),
+]
+
+
+@pytest.mark.parametrize("indent", INDENT_CASES)
+def test_build_hierarchy_matches_legacy(indent):
+    df = indent_frame(indent)
+    expected = legacy_build_hierarchy(df)
+    result, parents = transform.build_hierarchy(df, level_columns=MAX_LEVELS)
+
+    assert result["parent_concept"].tolist() == expected["parent_concept"].tolist()
+    for i in range(MAX_LEVELS):
+        col = f"Level_{i + 1}"
+        assert result[col].tolist() == expected[col].tolist()
+    assert result["node_id"].tolist() == list(range(len(df)))
+    assert result["parent_id"].tolist() == parents.tolist()
+
+
+@pytest.mark.parametrize("indent", INDENT_CASES)
+def test_nested_set_bounds_invariants(indent):
+    parents = transform.parent_positions(np.asarray(indent, dtype=np.int64))
+    lft, rgt, depth = transform.nested_set_bounds(parents)
+    n_rows = len(parents)
+
+    # Every bound 1..2n is used exactly once
+    assert sorted([*lft, *rgt]) == list(range(1, 2 * n_rows + 1))
+    for node in range(n_rows):
+        # Descendants are the rows whose lft lies within the node's bounds
+        inside = np.flatnonzero((lft > lft[node]) & (lft < rgt[node]))
+        descendants = [
+            row for row in range(n_rows) if node in _ancestors(parents, row)
+        ]
+        assert inside.tolist() == descendants
+        assert depth[node] == len(_ancestors(parents, node))
+
+
+def _ancestors(parents: np.ndarray, row: int) -> list[int]:
+    """Walks a row's parent chain."""
+    chain = []
+    while parents[row] >= 0:
+        row = parents[row]
+        chain.append(int(row))
+    return chain
+
+
+def test_parent_positions_block_starts_are_barriers():
+    indent = np.array([0, 1, 2, 1, 2, 0, 1])
+    sheets = pd.Series(["a", "a", "a", "b", "b", "b", "b"])
+    parents = transform.parent_positions(indent, transform.block_starts(sheets))
+    assert parents.tolist() == [-1, 0, 1, -1, 3, -1, 5]
+
+
+def test_build_hierarchy_keeps_parents_within_a_sheet():
+    df = indent_frame(np.array([0, 1, 2, 2, 3]))
+    df["sheet_name"] = ["first", "first", "first", "second", "second"]
+    _, parents = transform.build_hierarchy(df)
+    assert parents.tolist() == [-1, 0, 1, -1, 3]
+
+
+def test_block_starts_combines_keys():
+    codes = pd.Series(["1", "1", "2", "2", "2"])
+    sheets = pd.Series(["a", "a", "a", "b", "b"])
+    assert transform.block_starts(codes, sheets).tolist() == [True, False, True, True, False]
+    assert transform.block_starts(codes.iloc[:0]).tolist() == []
+
+
+@pytest.mark.parametrize(
+    ("sheets", "unique"),
+    [(["a", "b"], True), (["a", "a"], False), (None, False)],
+)
+def test_unique_full_path_is_checked_within_each_sheet(sheets, unique):
+    df_hierarchy = indent_frame(np.array([0, 0]))
+    df_hierarchy = df_hierarchy.assign(
+        group_code="110000", group_name="General", Type="text"
+    )
+    df_materialized_path = pd.DataFrame({"full_path": ["General > Name"] * 2})
+    if sheets is not None:
+        df_materialized_path.insert(0, "sheet_name", sheets)
+    qa = transform.qa_results(df_hierarchy, df_materialized_path)
+    assert qa["unique_full_path"] == unique
+
+
+def test_assign_group_headers_carries_across_batches():
+    pattern = re.compile(transform.DEFAULT_HEADER_PATTERN)
+    df = pd.DataFrame(
+        {"Concept name": ["[110000] General", "a", "b", "[210000] Position", "c"]}
+    )
+    whole, _ = transform.assign_group_headers(df, pattern, header_prefix="[")
+    first, carry = transform.assign_group_headers(df.iloc[:2], pattern, header_prefix="[")
+    second, _ = transform.assign_group_headers(df.iloc[2:], pattern, carry, "[")
+    pd.testing.assert_frame_equal(pd.concat([first, second]), whole)
+    assert whole["group_code"].tolist() == ["110000"] * 3 + ["210000"] * 2
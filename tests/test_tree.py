@@ -0,0 +1,115 @@
+"""Tests of the hierarchy outputs in src/etl/tree.py."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import src.etl.transform as transform
+import src.etl.tree as tree
+
+
+def hierarchy(n_rows: int = 120, seed: int = 0, n_sheets: int = 1) -> tuple:
+    """A hierarchy frame with several groups, a blank label and one optional column."""
+    rng = np.random.default_rng(seed)
+    indent = np.clip(np.cumsum(rng.choice([-2, -1, 0, 1, 1], size=n_rows)), 0, 6)
+    indent[0] = 0
+    labels = [f"Label {i}" for i in range(n_rows)]
+    labels[3] = ""
+    df = pd.DataFrame(
+        {
+            "excel_row": np.arange(n_rows) + 2,
+            "Concept name": [f"ifrs-full_Concept{i}" for i in range(n_rows)],
+            "Preferred label": labels,
+            "label_clean": labels,
+            "indent": indent,
+            "group_code": np.repeat(["110000", "210000", "310000"], -(-n_rows // 3))[:n_rows],
+            "group_name": np.repeat(["General", "Position", "Income"], -(-n_rows // 3))[:n_rows],
+            "Type": rng.choice(["abstract", "monetary", "text"], size=n_rows),
+            "Standard label": [f"Standard {i}" for i in range(n_rows)],
+        }
+    )
+    for col in ["Concept name", "label_clean", "group_code", "group_name", "Type"]:
+        df[col] = df[col].astype(transform.STRING_DTYPE)
+    if n_sheets > 1:
+        df["sheet_name"] = np.repeat(
+            [f"Sheet{i}" for i in range(n_sheets)], -(-n_rows // n_sheets)
+        )[:n_rows]
+    df_hierarchy, parents = transform.build_hierarchy(df)
+    return df_hierarchy, parents, tree.full_paths(df_hierarchy, parents)
+
+
+def _ancestors(parents: np.ndarray, row: int) -> list[int]:
+    """Walks a row's parent chain."""
+    chain = []
+    while parents[row] >= 0:
+        row = parents[row]
+        chain.append(int(row))
+    return chain
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_closure_table_matches_ancestor_walk(seed):
+    _, parents, _ = hierarchy(seed=seed)
+    closure = tree.closure_table(parents)
+
+    expected = sorted(
+        (ancestor, row, distance)
+        for row in range(len(parents))
+        for distance, ancestor in enumerate([row, *_ancestors(parents, row)])
+    )
+    assert list(closure.itertuples(index=False, name=None)) == expected
+    assert (closure.loc[closure["distance"] == 0, "ancestor_id"] == np.arange(len(parents))).all()
+
+
+def test_closure_table_empty():
+    closure = tree.closure_table(np.array([], dtype=np.int64))
+    assert closure.empty
+    assert list(closure.columns) == ["ancestor_id", "descendant_id", "distance"]
+
+
+@pytest.mark.parametrize("n_sheets", [1, 2])
+def test_compact_tree_to_nested_matches_build_tree(n_sheets):
+    df_hierarchy, parents, paths = hierarchy(n_sheets=n_sheets)
+    compact = tree.CompactTree.from_frame(df_hierarchy, parents)
+
+    assert compact.to_nested() == tree.build_tree(df_hierarchy, parents, paths)
+    assert compact.full_paths().tolist() == paths.tolist()
+
+
+def test_compact_tree_encodes_the_text_fields():
+    df_hierarchy, parents, _ = hierarchy(n_sheets=2)
+    compact = tree.CompactTree.from_frame(df_hierarchy, parents)
+    assert list(compact.codes) == [tree.SHEET_FIELD, *tree.CompactTree.TEXT_FIELDS]
+    assert compact.value("label", 3) == df_hierarchy["label_clean"].iloc[3]
+    assert compact.value("references", 0) is None
+
+
+def test_compact_tree_subtree_matches_nested_node():
+    df_hierarchy, parents, paths = hierarchy()
+    compact = tree.CompactTree.from_frame(df_hierarchy, parents)
+    nested = list(tree.iter_preorder(tree.build_tree(df_hierarchy, parents, paths)))
+
+    node = int(np.argmax(np.bincount(parents[parents >= 0])))
+    assert compact.subtree(node).to_nested() == [nested[node]]
+    assert compact.full_path(node) == paths[node]
+
+
+@pytest.mark.parametrize("n_sheets", [1, 2])
+def test_flatten_tree_round_trips_materialized_paths(n_sheets):
+    df_hierarchy, parents, paths = hierarchy(n_sheets=n_sheets)
+    nested = tree.build_tree(df_hierarchy, parents, paths)
+    expected = tree.materialized_path_table(df_hierarchy, paths)
+    result = tree.flatten_tree_to_table(nested)
+
+    assert list(result.columns) == list(expected.columns)
+    assert ("sheet_name" in result.columns) == (n_sheets > 1)
+    for col in expected.columns:
+        assert result[col].tolist() == tree._python_values(expected[col]), col
+
+
+def test_paths_start_with_group_name_and_are_unique():
+    df_hierarchy, parents, paths = hierarchy()
+    roots = np.flatnonzero(parents < 0)
+    for root in roots:
+        assert paths[root].startswith(df_hierarchy["group_name"].iloc[root])
+    assert len(set(paths)) == len(paths)